@@ -1,3 +1,30 @@
-from .auth import oauth2_scheme, validate_token, validate_user
-from .db import Session, get_db_connection, get_session
-from .roles import Scope, check_permissions
+from .auth import (
+    get_principal,
+    get_principal_async,
+    is_admin_request,
+    oauth2_scheme,
+    validate_token,
+    validate_user,
+)
+from .companies import CompanyFilter
+from .db import (
+    AsyncSession,
+    Session,
+    get_async_db_connection,
+    get_db_connection,
+    session_tracker,
+)
+from .exports import Export
+from .fields import FieldSet, Projection
+from .hashing import get_password_hasher
+from .pagination import KeysetPage
+from .reference import reference_cache, reference_response, settings_resolver
+from .roles import (
+    Scope,
+    check_permissions,
+    get_user_mask,
+    get_user_mask_async,
+    permission_cache,
+)
+from .streaming import Streaming
+from .uploads import import_body
@@ -1,53 +1,194 @@
 import logging
 
-from fastapi import Depends, HTTPException
+from fastapi import Depends, HTTPException, Request
 from fastapi.security import OAuth2PasswordBearer
+from pydantic import ValidationError
+from sqlalchemy import Row, func
+from sqlalchemy.engine import Engine
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel.sql.expression import Select
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.types import Scope as ASGIScope
 
+from app.api.models.users import Principal
 from app.api.services import (
     JWT,
     ExpiredSignatureError,
     InvalidTokenError,
     JwtPayload,
 )
-from app.core.database.models import Users
+from app.core.database.models import FunctionsDict, UserRoles, Users
+from app.core.permissions.acl import Scope, functions_mask, has_access
+from app.core.timing import phase
 
-from .db import get_db_connection
+from .db import get_async_db_connection, get_db_connection
+from .roles import join_user_functions, permission_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/")
 logger = logging.getLogger("app.api.dependencies.auth")
 
+_PRINCIPAL_COLUMNS = (
+    Users.id,
+    Users.company_id,
+    Users.group_id,
+    Users.timezone_id,
+    Users.username,
+    Users.firtsname,
+    Users.lastname,
+    Users.patronymic,
+    Users.created_date,
+    Users.user_lock,
+    Users.comment,
+)
+
+
+def _unverified_payload(token: str) -> JwtPayload | None:
+    try:
+        return JWT.payload(token)
+    except (InvalidTokenError, ValidationError):
+        return None
+
 
-def validate_token(token: str = Depends(oauth2_scheme)) -> JwtPayload:
+async def validate_token(token: str = Depends(oauth2_scheme)) -> JwtPayload:
     logger.debug(f"Token: {token=}")
-    payload = JWT.payload(token)
-    error = False
-    if token:
-        try:
-            JWT.validate(token)
-        except ExpiredSignatureError:
-            logger.info(f"Token expired: {payload=}")
-            detail = "Token expired"
-            error = True
-        except InvalidTokenError:
-            logger.info(f"Token invalid: {payload=}")
-            detail = "Invalid token"
-            error = True
-        if error:
-            raise HTTPException(
-                status_code=401,
-                detail=detail,
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-    return payload
-
-
-def validate_user(
+    try:
+        with phase("auth"):
+            return JWT.verify(token)
+    except ExpiredSignatureError:
+        logger.info(f"Token expired: payload={_unverified_payload(token)}")
+        detail = "Token expired"
+    except InvalidTokenError:
+        logger.info(f"Token invalid: payload={_unverified_payload(token)}")
+        detail = "Invalid token"
+    raise HTTPException(
+        status_code=401,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+# SELECT u.id, ..., array_agg(ur.role_id), array_agg(fd.code) FROM users u
+# LEFT JOIN user_roles ur ON ur.user_id=u.id
+# LEFT JOIN role_functions rf ON rf.role_id=ur.role_id
+# LEFT JOIN functions_dict fd ON rf.function_code_id=fd.id
+# WHERE u.id=12 GROUP BY u.id;
+def _principal_statement(user_id: int, acl: int | None) -> Select:
+    if acl is not None:
+        return select(*_PRINCIPAL_COLUMNS).where(Users.id == user_id)
+    return (
+        join_user_functions(
+            select(
+                *_PRINCIPAL_COLUMNS,
+                func.array_agg(UserRoles.role_id).label("roles"),
+                func.array_agg(FunctionsDict.code).label("functions"),
+            ).outerjoin(UserRoles, UserRoles.user_id == Users.id)
+        )
+        .where(Users.id == user_id)
+        .group_by(Users.id)
+        # The ACL is cached, see _user_mask_statement
+        .execution_options(read_primary=True)
+    )
+
+
+def _to_principal(
+    user_id: int, row: Row | None, acl: int | None, generation: tuple[int, int]
+) -> Principal | None:
+    if row is None:
+        return None
+    user = dict(row._mapping)
+    if acl is None:
+        roles = frozenset(role for role in user.pop("roles") if role is not None)
+        acl = functions_mask(code for code in user.pop("functions") if code is not None)
+        permission_cache.put(user_id, roles, acl, generation)
+    return Principal(**user, acl=acl)
+
+
+def load_principal(user_id: int, session: Session) -> Principal | None:
+    acl = permission_cache.get(user_id)
+    generation = permission_cache.generation(user_id)
+    row = session.exec(_principal_statement(user_id, acl)).first()
+    return _to_principal(user_id, row, acl, generation)
+
+
+async def load_principal_async(user_id: int, session: AsyncSession) -> Principal | None:
+    acl = permission_cache.get(user_id)
+    generation = permission_cache.generation(user_id)
+    row = (await session.exec(_principal_statement(user_id, acl))).first()
+    return _to_principal(user_id, row, acl, generation)
+
+
+def _remember_principal(request: Request, principal: Principal | None) -> Principal:
+    if principal is None:
+        raise HTTPException(
+            status_code=401,
+            detail="User not found",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    request.state.principal = principal
+    return principal
+
+
+def _check_lock(principal: Principal) -> Principal:
+    if principal.user_lock:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return principal
+
+
+def get_principal(
+    request: Request,
     session: Session = Depends(get_db_connection),
     token: JwtPayload = Depends(validate_token),
-) -> int:
-    statement = select(Users).where(Users.id == token.user_id)
-    user = session.exec(statement).first()
-    if user and user.user_lock:
-        raise HTTPException(status_code=400, detail="Inactive user")
-    return token.user_id
+) -> Principal:
+    # Lock status, company, group and ACL of the caller in one round trip,
+    # memoized for the rest of the request
+    principal = getattr(request.state, "principal", None)
+    if principal is None:
+        with phase("auth"):
+            loaded = load_principal(token.user_id, session)
+        principal = _remember_principal(request, loaded)
+    return _check_lock(principal)
+
+
+async def get_principal_async(
+    request: Request,
+    session: AsyncSession = Depends(get_async_db_connection),
+    token: JwtPayload = Depends(validate_token),
+) -> Principal:
+    principal = getattr(request.state, "principal", None)
+    if principal is None:
+        with phase("auth"):
+            loaded = await load_principal_async(token.user_id, session)
+        principal = _remember_principal(request, loaded)
+    return _check_lock(principal)
+
+
+def validate_user(principal: Principal = Depends(get_principal)) -> int:
+    return principal.id
+
+
+def _load_principal_now(engine: Engine, user_id: int) -> Principal | None:
+    with Session(engine) as session:
+        return load_principal(user_id, session)
+
+
+async def is_admin_request(scope: ASGIScope) -> bool:
+    # For middlewares, before any dependency runs. The ACL claim of the token
+    # is its issue time one, so the user is loaded as get_principal does:
+    # current ACL from the permission cache or the database, lock included
+    scheme, _, token = Headers(scope=scope).get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        payload = JWT.verify(token)
+    except (InvalidTokenError, ValidationError):
+        return False
+    principal = await run_in_threadpool(
+        _load_principal_now, scope["app"].state.db_engine, payload.user_id
+    )
+    if principal is None:
+        return False
+    # Memoized for get_principal, which would load the same row again
+    Request(scope).state.principal = principal
+    return not principal.user_lock and has_access(principal.acl, Scope.admin)
@@ -0,0 +1,45 @@
+import datetime
+
+from fastapi import HTTPException, Query
+
+from app.core.database.models import Companies
+
+
+class CompanyFilter:
+    # Exact matches only, so every filter can use its idx_companies_* index
+    def __init__(
+        self,
+        inn: str | None = Query(default=None, max_length=16),
+        kpp: str | None = Query(default=None, max_length=9),
+        ogrn: str | None = Query(default=None, max_length=13),
+        bic: str | None = Query(default=None, max_length=9),
+        property_id: int | None = None,
+        created_from: datetime.date | None = None,
+        created_to: datetime.date | None = None,
+    ):
+        if created_from and created_to and created_from > created_to:
+            raise HTTPException(
+                status_code=400, detail="created_from must not be after created_to"
+            )
+        self.equals = {
+            column: value
+            for column, value in (
+                (Companies.inn, inn),
+                (Companies.kpp, kpp),
+                (Companies.ogrn, ogrn),
+                (Companies.bic, bic),
+                (Companies.property_id, property_id),
+            )
+            if value is not None
+        }
+        self.created_from = created_from
+        self.created_to = created_to
+
+    def apply(self, statement):
+        for column, value in self.equals.items():
+            statement = statement.where(column == value)
+        if self.created_from is not None:
+            statement = statement.where(Companies.created_date >= self.created_from)
+        if self.created_to is not None:
+            statement = statement.where(Companies.created_date <= self.created_to)
+        return statement
@@ -1,12 +1,92 @@
+import logging
+import threading
+import time
+import weakref
+from collections.abc import AsyncIterator, Iterator
+
 from fastapi import Request
-from sqlalchemy.engine import Engine
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.database.routing import RoutingSession, reads_from_replica
+
+logger = logging.getLogger("app.api.dependencies.db")
+
+
+class SessionTracker:
+    """
+    Counts sessions handed out to requests and logs every session that was
+    garbage collected without being closed.
+    """
+
+    def __init__(self):
+        self.opened = 0
+        self.closed = 0
+        self.leaked = 0
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> int:
+        return self.opened - self.closed - self.leaked
 
+    def track(self, session: Session | AsyncSession, owner: str) -> weakref.finalize:
+        with self._lock:
+            self.opened += 1
+        return weakref.finalize(session, self._leak, owner, time.monotonic())
 
-def get_session(engine: Engine):
-    with Session(engine) as session:
+    def release(self, finalizer: weakref.finalize):
+        if finalizer.detach() is not None:
+            with self._lock:
+                self.closed += 1
+
+    def _leak(self, owner: str, opened_at: float):
+        with self._lock:
+            self.leaked += 1
+        logger.warning(
+            f"Session for {owner} was never closed, "
+            f"collected after {time.monotonic() - opened_at:.3f}s"
+        )
+
+    def metrics(self) -> dict:
+        return {
+            "opened": self.opened,
+            "closed": self.closed,
+            "leaked": self.leaked,
+            "active": self.active,
+        }
+
+
+session_tracker = SessionTracker()
+
+
+def get_db_connection(request: Request) -> Iterator[Session]:
+    # Created only for routes that depend on it and closed by FastAPI once the
+    # response is sent, returning the connection to the pool
+    replicas = request.app.state.db_replicas
+    session = RoutingSession(
+        request.app.state.db_engine,
+        replica=replicas.choose() if replicas and reads_from_replica(request) else None,
+    )
+    finalizer = session_tracker.track(session, f"{request.method} {request.url.path}")
+    try:
         yield session
+    finally:
+        session.close()
+        session_tracker.release(finalizer)
 
 
-def get_db_connection(request: Request) -> Session:
-    return next(request.state.db)
+async def get_async_db_connection(request: Request) -> AsyncIterator[AsyncSession]:
+    # Attributes expired on commit can't be lazy loaded outside of a greenlet
+    replicas = request.app.state.async_db_replicas
+    session = AsyncSession(
+        request.app.state.async_db_engine,
+        sync_session_class=RoutingSession,
+        replica=replicas.choose() if replicas and reads_from_replica(request) else None,
+        expire_on_commit=False,
+    )
+    finalizer = session_tracker.track(session, f"{request.method} {request.url.path}")
+    try:
+        yield session
+    finally:
+        await session.close()
+        session_tracker.release(finalizer)
@@ -0,0 +1,63 @@
+from collections.abc import Iterable, Sequence
+
+from fastapi import HTTPException, Query
+from sqlalchemy import Column
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import InstrumentedAttribute
+from sqlmodel import SQLModel, select
+
+
+class Projection:
+    def __init__(self, columns: list[Column]):
+        self.columns = columns
+
+    def select(self, *keys: InstrumentedAttribute):
+        # Sort keys are needed to build the next page cursor
+        names = {column.name for column in self.columns}
+        extra = [key for key in keys if key.key not in names]
+        return select(*self.columns, *extra)
+
+    @staticmethod
+    def row(row: Row) -> dict:
+        return dict(zip(map(str, row._fields), row, strict=True))
+
+    @staticmethod
+    def rows(rows: Sequence[Row]) -> list[dict]:
+        if not rows:
+            return []
+        # Keys are quoted_name, a str subclass orjson won't take as a dict key
+        fields = tuple(map(str, rows[0]._fields))
+        return [dict(zip(fields, row, strict=True)) for row in rows]
+
+
+class FieldSet:
+    """
+    `fields=id,username` query parameter. Only the requested columns are
+    selected and they come back as plain rows, without building ORM objects.
+    `id` and the sort keys of the page are always returned.
+    """
+
+    def __init__(self, model: type[SQLModel], exclude: Iterable[str] = ()):
+        self.columns = {
+            column.name: column
+            for column in model.__table__.columns
+            if column.name not in exclude
+        }
+
+    def __call__(
+        self,
+        fields: str | None = Query(
+            default=None, description="Comma separated list of fields to return"
+        ),
+    ) -> Projection:
+        if fields is None:
+            return Projection(list(self.columns.values()))
+        names = [name.strip() for name in fields.split(",") if name.strip()]
+        unknown = [name for name in names if name not in self.columns]
+        if unknown:
+            raise HTTPException(
+                status_code=400, detail=f"Unknown fields: {', '.join(unknown)}"
+            )
+        return Projection(
+            [self.columns[name] for name in dict.fromkeys(["id", *names])]
+        )
@@ -0,0 +1,7 @@
+from fastapi import Request
+
+from app.api.services import AsyncPasswordHasher
+
+
+async def get_password_hasher(request: Request) -> AsyncPasswordHasher:
+    return request.app.state.password_hasher
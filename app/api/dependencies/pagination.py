@@ -0,0 +1,106 @@
+import base64
+import bisect
+import datetime
+import json
+from collections.abc import Sequence
+from operator import itemgetter
+
+from fastapi import HTTPException, Query, Request, Response
+from sqlalchemy import tuple_
+from sqlalchemy.orm import InstrumentedAttribute
+
+from app.configs import get_page_settings
+
+page_settings = get_page_settings()
+
+
+def encode_cursor(keys: Sequence[InstrumentedAttribute], values: Sequence) -> str:
+    payload = {
+        "k": [key.key for key in keys],
+        "v": [
+            value.isoformat() if isinstance(value, datetime.date) else value
+            for value in values
+        ],
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, keys: Sequence[InstrumentedAttribute]) -> list:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if payload["k"] != [key.key for key in keys]:
+            raise ValueError("sort order changed")
+        values = []
+        for key, value in zip(keys, payload["v"], strict=True):
+            python_type = key.type.python_type
+            if python_type is datetime.date:
+                value = datetime.date.fromisoformat(value)
+            # A forged value would reach the database and fail there with 500;
+            # JSON true and false are ints to isinstance
+            if not isinstance(value, python_type) or (
+                isinstance(value, bool) and python_type is not bool
+            ):
+                raise ValueError(f"{key.key} must be {python_type.__name__}")
+            values.append(value)
+    except (ValueError, TypeError, KeyError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {e}")
+    return values
+
+
+class KeysetPage:
+    """
+    Keyset pagination: the page is the `limit` rows sorting after the last
+    row of the previous page, so the query is an index range scan however
+    deep the client pages. The cursor of the next page is returned in the
+    X-Next-Cursor and Link headers, the body stays a plain list.
+    """
+
+    def __init__(
+        self,
+        request: Request,
+        response: Response,
+        limit: int = Query(default=page_settings.default_limit, ge=1),
+        after: str | None = Query(
+            default=None, description="Cursor from the X-Next-Cursor header"
+        ),
+    ):
+        self.request = request
+        self.response = response
+        self.limit = min(limit, page_settings.max_limit)
+        self.after = after
+
+    def apply(self, statement, *keys: InstrumentedAttribute):
+        if self.after is not None:
+            values = decode_cursor(self.after, keys)
+            if len(keys) == 1:
+                statement = statement.where(keys[0] > values[0])
+            else:
+                statement = statement.where(tuple_(*keys) > tuple_(*values))
+        # One extra row tells whether there is a next page
+        return statement.order_by(*keys).limit(self.limit + 1)
+
+    def slice(self, rows: Sequence[dict], key: InstrumentedAttribute) -> list[dict]:
+        # The same page over rows already in memory and sorted by key
+        start = 0
+        if self.after is not None:
+            (value,) = decode_cursor(self.after, (key,))
+            start = bisect.bisect_right(rows, value, key=itemgetter(key.key))
+        return self.finish(rows[start : start + self.limit + 1], key)
+
+    def finish(self, rows: Sequence, *keys: InstrumentedAttribute) -> list:
+        rows = list(rows)
+        if len(rows) > self.limit:
+            rows = rows[: self.limit]
+            last = rows[-1]
+            values = (
+                [last[key.key] for key in keys]
+                if isinstance(last, dict)
+                else [getattr(last, key.key) for key in keys]
+            )
+            cursor = encode_cursor(keys, values)
+            url = self.request.url.include_query_params(after=cursor)
+            self.response.headers["X-Next-Cursor"] = cursor
+            self.response.headers["Link"] = f'<{url}>; rel="next"'
+        return rows
@@ -0,0 +1,64 @@
+from fastapi import Request, Response
+from sqlalchemy.orm import InstrumentedAttribute
+
+from app.api.responses import dumps
+from app.api.services import ReferenceCache, ReferenceTable, SettingsResolver, etag
+from app.configs import get_reference_settings
+from app.core.database.models import (
+    FunctionsDict,
+    PropertyCodeDict,
+    RolesDict,
+    SettingsDict,
+    ShablonDict,
+    StatusDict,
+    TimezoneDict,
+)
+
+from .pagination import KeysetPage
+
+reference_settings = get_reference_settings()
+reference_cache = ReferenceCache(
+    [
+        FunctionsDict,
+        PropertyCodeDict,
+        RolesDict,
+        SettingsDict,
+        ShablonDict,
+        StatusDict,
+        TimezoneDict,
+    ],
+    reference_settings.ttl,
+)
+reference_cache.watch()
+settings_resolver = SettingsResolver(reference_settings.ttl)
+
+CACHE_CONTROL = (
+    f"{'public' if reference_settings.public else 'private'}, "
+    f"max-age={reference_settings.max_age}"
+)
+
+
+def _not_modified(request: Request, tag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = {value.strip().removeprefix("W/") for value in header.split(",")}
+    return tag in tags or "*" in tags
+
+
+def reference_response(
+    request: Request,
+    page: KeysetPage,
+    table: ReferenceTable,
+    key: InstrumentedAttribute,
+) -> Response:
+    """Page of a cached reference table, 304 if the client has it already"""
+    if page.after is None and page.limit >= len(table.rows):
+        body, tag = table.body, table.etag
+    else:
+        body = dumps(page.slice(table.rows, key))
+        tag = etag(body)
+    headers = {**page.response.headers, "ETag": tag, "Cache-Control": CACHE_CONTROL}
+    if _not_modified(request, tag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
@@ -1,35 +1,80 @@
+from collections.abc import Sequence
+
+from sqlalchemy import Row
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel.sql.expression import Select
 from starlette.exceptions import HTTPException
 
-from app.core.database.models import FunctionsDict, RoleFunctions, RolesDict, UserRoles
-from app.core.permissions.acl import ACL, Scope
+from app.api.models.users import Principal
+from app.configs import get_acl_settings
+from app.core.database.models import FunctionsDict, RoleFunctions, UserRoles
+from app.core.permissions.acl import Scope, functions_mask, has_access
+from app.core.permissions.cache import PermissionCache
+from app.core.timing import phase
+
+_acl_settings = get_acl_settings()
+permission_cache = PermissionCache(_acl_settings.cache_size, _acl_settings.cache_ttl)
 
-# SELECT rd.*,fd.* FROM user_roles ur
-# JOIN roles_dict rd ON rd.id=ur.role_id
-# JOIN role_functions rf ON rf.role_id=rd.id
-# JOIN functions_dict fd ON rf.function_code_id=fd.id
+# SELECT ur.role_id, fd.code FROM user_roles ur
+# LEFT JOIN role_functions rf ON rf.role_id=ur.role_id
+# LEFT JOIN functions_dict fd ON rf.function_code_id=fd.id
 # WHERE ur.user_id=12;
 
 
-def check_permissions(
-    user_id: int,
-    current_scope: Scope,
-    session: Session,
-):
-    statement = (
-        select(FunctionsDict)
-        .select_from(UserRoles)
-        .join(RolesDict, RolesDict.id == UserRoles.role_id)
-        .join(RoleFunctions, RoleFunctions.role_id == RolesDict.id)
-        .join(FunctionsDict, FunctionsDict.id == RoleFunctions.function_code_id)
+def join_user_functions(statement: Select) -> Select:
+    return statement.outerjoin(
+        RoleFunctions, RoleFunctions.role_id == UserRoles.role_id
+    ).outerjoin(FunctionsDict, FunctionsDict.id == RoleFunctions.function_code_id)
+
+
+def _user_mask_statement(user_id: int) -> Select:
+    # Cached for a whole TTL, so never taken from a lagging replica
+    return (
+        join_user_functions(
+            select(UserRoles.role_id, FunctionsDict.code).select_from(UserRoles)
+        )
         .where(UserRoles.user_id == user_id)
+        .execution_options(read_primary=True)
     )
-    functions_dict = session.exec(statement).fetchall()
-    for fun_dict in functions_dict:
-        if fun_dict.code in ACL[current_scope]:
-            return True
+
+
+def _cache_user_mask(
+    user_id: int, rows: Sequence[Row], generation: tuple[int, int]
+) -> int:
+    roles = frozenset(row.role_id for row in rows)
+    mask = functions_mask(row.code for row in rows if row.code is not None)
+    permission_cache.put(user_id, roles, mask, generation)
+    return mask
+
+
+def get_user_mask(user_id: int, session: Session) -> int:
+    mask = permission_cache.get(user_id)
+    if mask is not None:
+        return mask
+    generation = permission_cache.generation(user_id)
+    with phase("permission"):
+        rows = session.exec(_user_mask_statement(user_id)).all()
+    return _cache_user_mask(user_id, rows, generation)
+
+
+async def get_user_mask_async(user_id: int, session: AsyncSession) -> int:
+    mask = permission_cache.get(user_id)
+    if mask is not None:
+        return mask
+    generation = permission_cache.generation(user_id)
+    with phase("permission"):
+        rows = (await session.exec(_user_mask_statement(user_id))).all()
+    return _cache_user_mask(user_id, rows, generation)
+
+
+def check_permissions(principal: Principal, current_scope: Scope):
+    with phase("permission"):
+        allowed = has_access(principal.acl, current_scope)
+    if allowed:
+        return True
 
     raise HTTPException(
         status_code=403,
-        detail=f"User {user_id} doesn't have permission to {current_scope}",
+        detail=f"User {principal.id} doesn't have permission to {current_scope}",
     )
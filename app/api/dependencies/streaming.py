@@ -0,0 +1,65 @@
+from collections.abc import AsyncIterator, Iterator
+
+from fastapi import Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.engine import Result
+from sqlalchemy.ext.asyncio import AsyncResult
+
+from app.api.responses import dumps
+from app.configs import get_page_settings
+
+from .fields import Projection
+
+NDJSON = "application/x-ndjson"
+
+page_settings = get_page_settings()
+
+
+class Streaming:
+    """
+    Streams the whole list instead of a page, in NDJSON when asked for with
+    `Accept: application/x-ndjson`, otherwise as one JSON array. Rows come
+    from a server-side cursor in batches and are encoded batch by batch, so
+    memory doesn't grow with the table.
+    """
+
+    def __init__(
+        self,
+        request: Request,
+        stream: bool = Query(default=False, description="Stream the whole list"),
+    ):
+        self.ndjson = NDJSON in request.headers.get("accept", "")
+        self.enabled = stream or self.ndjson
+        self.options = {"yield_per": page_settings.stream_batch_size}
+
+    def _chunks(self, partition, first: bool) -> bytes:
+        rows = [dumps(row) for row in Projection.rows(partition)]
+        if self.ndjson:
+            return b"".join(row + b"\n" for row in rows)
+        return (b"[" if first else b",") + b",".join(rows)
+
+    def _iterate(self, result: Result) -> Iterator[bytes]:
+        first = True
+        for partition in result.partitions():
+            yield self._chunks(partition, first)
+            first = False
+        if not self.ndjson:
+            yield b"[]" if first else b"]"
+
+    async def _aiterate(self, result: AsyncResult) -> AsyncIterator[bytes]:
+        first = True
+        async for partition in result.partitions():
+            yield self._chunks(partition, first)
+            first = False
+        if not self.ndjson:
+            yield b"[]" if first else b"]"
+
+    def response(self, result: Result | AsyncResult) -> StreamingResponse:
+        content = (
+            self._aiterate(result)
+            if isinstance(result, AsyncResult)
+            else self._iterate(result)
+        )
+        return StreamingResponse(
+            content, media_type=NDJSON if self.ndjson else "application/json"
+        )
@@ -0,0 +1,24 @@
+from fastapi import HTTPException, Request
+
+from app.api.services import CSV, NDJSON
+from app.configs import get_import_settings
+
+import_settings = get_import_settings()
+
+
+async def import_body(request: Request) -> tuple[str, bytes]:
+    """Media type and body of a CSV or NDJSON upload, capped at max_bytes"""
+    media_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if media_type not in (CSV, NDJSON):
+        raise HTTPException(status_code=415, detail=f"Expected {CSV} or {NDJSON} body")
+    too_large = HTTPException(
+        status_code=413, detail=f"Body is larger than {import_settings.max_bytes} bytes"
+    )
+    if int(request.headers.get("content-length") or 0) > import_settings.max_bytes:
+        raise too_large
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > import_settings.max_bytes:
+            raise too_large
+    return media_type, bytes(body)
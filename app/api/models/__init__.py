@@ -1 +1 @@
-from .users import UserCreate
+from .users import Principal, UserCreate
@@ -3,6 +3,12 @@ from pydantic import BaseModel
 from app.core.database.models import Companies, UserGroups
 
 
+class CompanyProperty(BaseModel):
+    property_code_id: int
+    value: str | None = None
+
+
 class CreateCompany(BaseModel):
     company: Companies
     user_group: UserGroups | None = None
+    properties: list[CompanyProperty] = []
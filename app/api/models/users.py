@@ -1,6 +1,10 @@
-from datetime import datetime
+from datetime import date, datetime
+from typing import Annotated
 
-from pydantic import BaseModel, Field, SecretStr
+from pydantic import BaseModel, ConfigDict, Field, SecretStr
+
+BigId = Annotated[int, Field(gt=0, lt=2**63)]
+Name = Annotated[str, Field(min_length=1, max_length=60)]
 
 
 class UserCreate(BaseModel):
@@ -13,6 +17,25 @@ class UserCreate(BaseModel):
     comment: str | None = None
 
 
+class UserImport(BaseModel):
+    # Limits mirror the users columns: a row COPY can't store fails alone here
+    # instead of aborting the whole load
+    model_config = ConfigDict(extra="forbid")
+
+    company_id: BigId
+    group_id: BigId
+    timezone_id: int = Field(ge=0, lt=2**15)
+    username: Name
+    firtsname: Name
+    lastname: Name
+    patronymic: Name | None = None
+    created_date: date = Field(default_factory=date.today)
+    user_lock: bool = False
+    comment: str | None = Field(default=None, max_length=1000)
+    # bcrypt ignores anything past 72 bytes
+    password: SecretStr = Field(min_length=1, max_length=72)
+
+
 class User(BaseModel):
     username: str
     firtsname: str
@@ -33,3 +56,18 @@ class UserLogin(BaseModel):
 class ResponseToken(BaseModel):
     access_token: str
     token_type: str
+
+
+class Principal(BaseModel):
+    id: int
+    company_id: int
+    group_id: int
+    timezone_id: int
+    username: str
+    firtsname: str
+    lastname: str
+    patronymic: str | None = None
+    created_date: date
+    user_lock: bool
+    comment: str | None = None
+    acl: int = 0
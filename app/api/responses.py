@@ -0,0 +1,41 @@
+import decimal
+from typing import Any
+
+import pydantic_core
+from fastapi.responses import JSONResponse
+
+from app.core.timing import phase
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(value):
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Same bytes as FastAPI's pydantic serialization: dates in ISO format,
+    UTC datetimes with "Z", Decimals as strings, non-ASCII as is.
+    orjson is used when installed, pydantic's encoder otherwise and for
+    values orjson rejects (tz-aware time, integers over 64 bits).
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(content, default=_default, option=orjson.OPT_UTC_Z)
+        except orjson.JSONEncodeError:
+            pass
+    return pydantic_core.to_json(content)
+
+
+class FastJSONResponse(JSONResponse):
+    # For handlers that already return plain dicts (projected rows): there is
+    # no response model, so nothing is validated again
+    def render(self, content: Any) -> bytes:
+        with phase("serialize"):
+            return dumps(content)
@@ -1,7 +1,12 @@
-from .hashing import PasswordHasher
+from .companies import ainsert_companies, insert_companies
+from .hashing import AsyncPasswordHasher, HashingQueueFull, PasswordHasher
 from .jwt import (
     JWT,
     ExpiredSignatureError,
     InvalidTokenError,
     JwtPayload,
+    TokenCache,
 )
+from .reference import ReferenceCache, ReferenceTable, etag
+from .settings_resolver import SettingsResolver, Timeline
+from .user_import import CSV, NDJSON, InvalidImport, import_report, parse_users
@@ -0,0 +1,65 @@
+from collections.abc import Sequence
+
+from sqlalchemy import Row, insert
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.api.models.companies import CreateCompany
+from app.core.database.models import Companies, CompanyProperties, UserGroups
+
+# Rows come back in the order of the parameters, so the n-th id belongs to
+# the n-th company of the request
+INSERT_COMPANIES = insert(Companies).returning(
+    *Companies.__table__.columns, sort_by_parameter_order=True
+)
+INSERT_GROUPS = insert(UserGroups)
+INSERT_PROPERTIES = insert(CompanyProperties)
+
+
+def _companies(creates: Sequence[CreateCompany]) -> list[dict]:
+    return [create.company.model_dump(exclude={"id"}) for create in creates]
+
+
+def _dependents(
+    creates: Sequence[CreateCompany], companies: Sequence[Row]
+) -> tuple[list[dict], list[dict]]:
+    groups, properties = [], []
+    for create, company in zip(creates, companies, strict=True):
+        if create.user_group is None:
+            group = {"group_name": company.name, "comment": "Default group"}
+        else:
+            group = create.user_group.model_dump(include={"group_name", "comment"})
+        groups.append({**group, "company_id": company.id})
+        properties += [
+            {**prop.model_dump(), "company_id": company.id}
+            for prop in create.properties
+        ]
+    return groups, properties
+
+
+def insert_companies(
+    session: Session, creates: Sequence[CreateCompany]
+) -> Sequence[Row]:
+    """
+    Companies with their default groups and properties: one multi-row
+    INSERT ... RETURNING per table in the session's transaction, whatever
+    the number of companies. Committing is up to the caller.
+    """
+    companies = session.exec(INSERT_COMPANIES, params=_companies(creates)).all()
+    groups, properties = _dependents(creates, companies)
+    session.exec(INSERT_GROUPS, params=groups)
+    if properties:
+        session.exec(INSERT_PROPERTIES, params=properties)
+    return companies
+
+
+async def ainsert_companies(
+    session: AsyncSession, creates: Sequence[CreateCompany]
+) -> Sequence[Row]:
+    result = await session.exec(INSERT_COMPANIES, params=_companies(creates))
+    companies = result.all()
+    groups, properties = _dependents(creates, companies)
+    await session.exec(INSERT_GROUPS, params=groups)
+    if properties:
+        await session.exec(INSERT_PROPERTIES, params=properties)
+    return companies
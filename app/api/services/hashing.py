@@ -1,5 +1,13 @@
+import asyncio
+import multiprocessing
+import time
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
 from passlib.context import CryptContext
 
+from app.configs.settings import HashingSettings
+
 
 class PasswordHasher:
     __slots__ = ()
@@ -12,3 +20,118 @@ class PasswordHasher:
     @classmethod
     def hash_password(cls, password: str | bytes):
         return cls.pwd_context.hash(password)
+
+
+def _hash_chunk(passwords: list[str]) -> list[str]:
+    return [PasswordHasher.hash_password(password) for password in passwords]
+
+
+# Forking a process with running threads (uvicorn's, the anyio pool) can copy
+# a lock that one of them holds and deadlock the child
+_processes = multiprocessing.get_context("forkserver")
+
+
+class HashingQueueFull(Exception):
+    pass
+
+
+class AsyncPasswordHasher:
+    """
+    Runs bcrypt on a dedicated pool, so a burst of logins can't exhaust
+    the anyio threadpool shared by every other endpoint.
+    Jobs above workers + max_queue are rejected instead of queued.
+    """
+
+    def __init__(self, settings: HashingSettings):
+        self.executor_type = settings.executor
+        self.workers = settings.workers
+        self.max_queue = settings.max_queue
+        self._executor: Executor
+        if settings.executor == "process":
+            self._executor = ProcessPoolExecutor(
+                max_workers=settings.workers, mp_context=_processes
+            )
+        else:
+            self._executor = ThreadPoolExecutor(
+                max_workers=settings.workers, thread_name_prefix="hashing"
+            )
+        # Bulk imports would hold every worker above for minutes
+        self.bulk_workers = settings.bulk_workers
+        self.bulk_chunk_size = settings.bulk_chunk_size
+        # Started by the first import, most processes never run one
+        self._bulk_executor: ProcessPoolExecutor | None = None
+        self._pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self._pending - self.workers)
+
+    async def _run(self, func: Callable, *args):
+        if self._pending >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise HashingQueueFull(
+                f"Hashing queue is full: {self._pending} jobs pending"
+            )
+        self._pending += 1
+        started = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            self._pending -= 1
+            latency = time.perf_counter() - started
+            self.completed += 1
+            self._latency_total += latency
+            self._latency_max = max(self._latency_max, latency)
+
+    async def verify_password(
+        self, plain_password: str | bytes, hashed_password: str | bytes
+    ) -> bool:
+        return await self._run(
+            PasswordHasher.verify_password, plain_password, hashed_password
+        )
+
+    async def hash_password(self, password: str | bytes) -> str:
+        return await self._run(PasswordHasher.hash_password, password)
+
+    async def hash_many(self, passwords: list[str]) -> list[str]:
+        # Not admission controlled: the bulk pool is only used by imports
+        if self._bulk_executor is None:
+            self._bulk_executor = ProcessPoolExecutor(
+                max_workers=self.bulk_workers, mp_context=_processes
+            )
+        loop = asyncio.get_running_loop()
+        size = self.bulk_chunk_size
+        chunks = await asyncio.gather(
+            *(
+                loop.run_in_executor(
+                    self._bulk_executor, _hash_chunk, passwords[i : i + size]
+                )
+                for i in range(0, len(passwords), size)
+            )
+        )
+        return [hashed for chunk in chunks for hashed in chunk]
+
+    def metrics(self) -> dict:
+        return {
+            "executor": self.executor_type,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "pending": self._pending,
+            "queue_depth": self.queue_depth,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "latency_avg_seconds": (
+                self._latency_total / self.completed if self.completed else 0.0
+            ),
+            "latency_max_seconds": self._latency_max,
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._bulk_executor is not None:
+            self._bulk_executor.shutdown(wait=False, cancel_futures=True)
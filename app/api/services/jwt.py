@@ -1,3 +1,8 @@
+import hashlib
+import heapq
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from uuid import uuid4
 
@@ -19,6 +24,8 @@ class JwtPayload(BaseModel):
     ttl: int = 900 * 60 * 24 * 30  # 30 days
     jti: str = Field(default_factory=uuid_str_factory)
     user_id: int
+    # Compiled ACL mask of the user at issue time (see app.core.permissions.acl)
+    acl: int = 0
 
     @computed_field(return_type=int)
     def exp(self):
@@ -36,11 +43,96 @@ class JwtRefreshTokenPayload(JwtPayload):
     ttl: int = 30 * 24 * 60 * 60  # 30 days in seconds
 
 
+class TokenCache:
+    """
+    LRU of verified tokens keyed by sha256 of the token.
+    Entries leave the cache after ttl seconds, at the token's exp at the
+    latest, or when their jti is revoked.
+
+    Revoked jtis are kept in this process only: with several workers a
+    token revoked in one of them is still accepted by the others.
+    """
+
+    def __init__(self, maxsize: int, ttl: int = 300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._tokens: OrderedDict[bytes, tuple[JwtPayload, int]] = OrderedDict()
+        self._expires: list[tuple[int, bytes]] = []
+        self._revoked: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def _evict_expired(self, now: float):
+        while self._expires and self._expires[0][0] <= now:
+            exp, key = heapq.heappop(self._expires)
+            entry = self._tokens.get(key)
+            if entry is not None and entry[1] == exp:
+                del self._tokens[key]
+
+    def get(self, token: str) -> JwtPayload | None:
+        key = self._key(token)
+        with self._lock:
+            entry = self._tokens.get(key)
+            if entry is not None:
+                payload, exp = entry
+                if exp > time.time() and payload.jti not in self._revoked:
+                    self._tokens.move_to_end(key)
+                    self.hits += 1
+                    return payload
+                del self._tokens[key]
+            self.misses += 1
+            return None
+
+    def put(self, token: str, payload: JwtPayload, exp: int):
+        key = self._key(token)
+        now = time.time()
+        exp = min(exp, int(now) + self.ttl)
+        with self._lock:
+            self._evict_expired(now)
+            self._tokens[key] = (payload, exp)
+            self._tokens.move_to_end(key)
+            heapq.heappush(self._expires, (exp, key))
+            while len(self._tokens) > self.maxsize:
+                self._tokens.popitem(last=False)
+            if len(self._expires) > 2 * self.maxsize:
+                self._expires = [(exp, key) for key, (_, exp) in self._tokens.items()]
+                heapq.heapify(self._expires)
+
+    def revoke(self, jti: str, exp: int):
+        now = time.time()
+        with self._lock:
+            self._revoked = {j: e for j, e in self._revoked.items() if e > now}
+            self._revoked[jti] = exp
+            for key, (payload, _) in list(self._tokens.items()):
+                if payload.jti == jti:
+                    del self._tokens[key]
+
+    def is_revoked(self, jti: str) -> bool:
+        return jti in self._revoked
+
+    def metrics(self) -> dict:
+        requests = self.hits + self.misses
+        return {
+            "size": len(self._tokens),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / requests if requests else 0.0,
+            "revoked": len(self._revoked),
+        }
+
+
 class JWT:
     _instance = None
     _jwt_settings = JwtSettings()
     SECRET_KEY = _jwt_settings.secret_key
     ALGORITHM = _jwt_settings.algorithm
+    cache = TokenCache(_jwt_settings.cache_size, _jwt_settings.cache_ttl)
 
     @classmethod
     def generate_token(cls, payload: JwtPayload) -> str:
@@ -51,10 +143,35 @@ class JWT:
         _jwt = jwt.decode(token, cls.SECRET_KEY, algorithms=[cls.ALGORITHM])
         return JwtPayload(**_jwt)
 
+    @classmethod
+    def verify(cls, token: str) -> JwtPayload:
+        # Repeated tokens skip the HMAC check and pydantic validation
+        payload = cls.cache.get(token)
+        if payload is not None:
+            return payload
+        _jwt = jwt.decode(token, cls.SECRET_KEY, algorithms=[cls.ALGORITHM])
+        payload = JwtPayload(**_jwt)
+        if cls.cache.is_revoked(payload.jti):
+            raise InvalidTokenError(f"Token {payload.jti} is revoked")
+        if "exp" in _jwt:
+            cls.cache.put(token, payload, _jwt["exp"])
+        return payload
+
+    @classmethod
+    def revoke(cls, token: str):
+        _jwt = jwt.decode(token, cls.SECRET_KEY, algorithms=[cls.ALGORITHM])
+        cls.cache.revoke(_jwt["jti"], _jwt["exp"])
+
     @classmethod
     def payload(cls, token: str) -> JwtPayload:
         _jwt = jwt.decode(token, options={"verify_signature": False})
         return JwtPayload(**_jwt)
 
 
-__all__ = ("JWT", "ExpiredSignatureError", "InvalidTokenError", "JwtPayload")
+__all__ = (
+    "JWT",
+    "ExpiredSignatureError",
+    "InvalidTokenError",
+    "JwtPayload",
+    "TokenCache",
+)
@@ -0,0 +1,117 @@
+import hashlib
+import threading
+import time
+from collections.abc import Iterable
+from typing import NamedTuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import Session, SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.api.responses import dumps
+from app.core.database.routing import read_primary
+
+
+class ReferenceTable(NamedTuple):
+    loaded_at: float
+    rows: list[dict]
+    body: bytes
+    etag: str
+
+
+def etag(body: bytes) -> str:
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+class ReferenceCache:
+    """
+    Whole reference tables (*_dict) kept in memory as rows and as the
+    rendered JSON body with its ETag. The ETag is a hash of the body, so it
+    is the same in every worker for the same data.
+    A table is reloaded after `ttl` seconds, or on the next read after an
+    ORM write to it commits in this process.
+    """
+
+    def __init__(self, models: Iterable[type[SQLModel]], ttl: float):
+        self.models = tuple(models)
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._tables: dict[type[SQLModel], ReferenceTable] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _statement(model: type[SQLModel]):
+        table = model.__table__
+        return select(*table.columns).order_by(*table.primary_key.columns)
+
+    def _put(self, model: type[SQLModel], rows) -> ReferenceTable:
+        rows = [dict(zip(map(str, row._fields), row, strict=True)) for row in rows]
+        body = dumps(rows)
+        loaded = ReferenceTable(time.monotonic(), rows, body, etag(body))
+        with self._lock:
+            self._tables[model] = loaded
+        return loaded
+
+    def get(self, model: type[SQLModel]) -> ReferenceTable | None:
+        with self._lock:
+            loaded = self._tables.get(model)
+            if loaded is not None and time.monotonic() - loaded.loaded_at < self.ttl:
+                self.hits += 1
+                return loaded
+            self.misses += 1
+            return None
+
+    def load(self, session: Session, model: type[SQLModel]) -> ReferenceTable:
+        read_primary(session)
+        return self._put(model, session.exec(self._statement(model)).fetchall())
+
+    async def aload(
+        self, session: AsyncSession, model: type[SQLModel]
+    ) -> ReferenceTable:
+        read_primary(session)
+        result = await session.exec(self._statement(model))
+        return self._put(model, result.fetchall())
+
+    def load_all(self, session: Session):
+        for model in self.models:
+            self.load(session, model)
+
+    def invalidate(self, *models: type[SQLModel]):
+        with self._lock:
+            for model in models:
+                self._tables.pop(model, None)
+
+    def watch(self):
+        # Every ORM session: tables written in a transaction are dropped once
+        # it commits, so the next read loads them again
+        @event.listens_for(OrmSession, "after_flush")
+        def _written(session, flush_context):
+            written = session.info.setdefault("reference_written", set())
+            for instance in (*session.new, *session.dirty, *session.deleted):
+                if type(instance) in self.models:
+                    written.add(type(instance))
+
+        @event.listens_for(OrmSession, "after_commit")
+        def _committed(session):
+            self.invalidate(*session.info.pop("reference_written", ()))
+
+        @event.listens_for(OrmSession, "after_rollback")
+        def _rolled_back(session):
+            session.info.pop("reference_written", None)
+
+    def metrics(self) -> dict:
+        requests = self.hits + self.misses
+        with self._lock:
+            tables = dict(self._tables)
+        return {
+            "tables": {
+                model.__tablename__: len(loaded.rows)
+                for model, loaded in tables.items()
+            },
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / requests if requests else 0.0,
+        }
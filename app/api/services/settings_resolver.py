@@ -0,0 +1,180 @@
+import bisect
+import datetime
+import logging
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Sequence
+
+from sqlalchemy import Row
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.database.models import Settings, SettingsDict
+from app.core.database.routing import read_primary
+
+logger = logging.getLogger("app.api.services.settings_resolver")
+
+ONE_DAY = datetime.timedelta(days=1)
+# A failed reload is not retried on every read while the database is down
+RETRY_SECONDS = 5.0
+
+STATEMENT = select(
+    SettingsDict.code,
+    Settings.id,
+    Settings.value,
+    Settings.active_from,
+    Settings.active_to,
+).join(SettingsDict, SettingsDict.id == Settings.setting_code_id)
+
+
+class Timeline:
+    """
+    Effective value of one setting over time: `values[i]` holds from
+    `starts[i]` until the next start, None is a gap. Where versions overlap
+    the one that started last wins; active_to is the last active day.
+    """
+
+    __slots__ = ("starts", "values")
+
+    def __init__(self, versions: Sequence[Row]):
+        boundaries = {version.active_from for version in versions}
+        boundaries |= {
+            version.active_to + ONE_DAY for version in versions if version.active_to
+        }
+        self.starts: list[datetime.date] = []
+        self.values: list[str | None] = []
+        for start in sorted(boundaries):
+            active = [
+                version
+                for version in versions
+                if version.active_from <= start
+                and (version.active_to is None or start <= version.active_to)
+            ]
+            value = (
+                max(active, key=lambda v: (v.active_from, v.id)).value
+                if active
+                else None
+            )
+            if self.values and self.values[-1] == value:
+                continue
+            self.starts.append(start)
+            self.values.append(value)
+
+    def at(self, day: datetime.date) -> str | None:
+        i = bisect.bisect_right(self.starts, day) - 1
+        return self.values[i] if i >= 0 else None
+
+    def next_change(self, day: datetime.date) -> datetime.date | None:
+        i = bisect.bisect_right(self.starts, day)
+        return self.starts[i] if i < len(self.starts) else None
+
+
+class SettingsResolver:
+    """
+    All versions of the settings table as per-code timelines, answering
+    "value of code X at day D" with a binary search.
+    The values of today are kept precomputed until the nearest transition
+    of any code, and recomputed on the first read from that day on.
+    The table is reloaded from the engine given to `bind` by the first read
+    after `ttl` seconds or after `invalidate`. Until that succeeds the last
+    loaded values are served.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._timelines: dict[str, Timeline] = {}
+        self._loaded_at: float | None = None
+        self._today: dict[str, str] = {}
+        self._valid_until: datetime.date | None = None
+        self._lock = threading.Lock()
+        self._engine: Engine | None = None
+        self._reload_lock = threading.Lock()
+        self._retry_at = 0.0
+
+    @property
+    def stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at >= self.ttl
+
+    def _put(self, rows: Sequence[Row]):
+        versions = defaultdict(list)
+        for row in rows:
+            versions[row.code].append(row)
+        timelines = {code: Timeline(rows) for code, rows in versions.items()}
+        with self._lock:
+            self._timelines = timelines
+            self._loaded_at = time.monotonic()
+            self._valid_until = None
+
+    def load(self, session: Session):
+        read_primary(session)
+        self._put(session.exec(STATEMENT).fetchall())
+
+    async def aload(self, session: AsyncSession):
+        read_primary(session)
+        self._put((await session.exec(STATEMENT)).fetchall())
+
+    def bind(self, engine: Engine):
+        self._engine = engine
+
+    def _refresh(self):
+        if not self.stale or self._engine is None:
+            return
+        if time.monotonic() < self._retry_at:
+            return
+        with self._reload_lock:
+            # Reloaded by another thread while this one waited
+            if not self.stale:
+                return
+            try:
+                with Session(self._engine) as session:
+                    self.load(session)
+            except Exception as e:
+                self._retry_at = time.monotonic() + RETRY_SECONDS
+                logger.error(f"Settings were not reloaded: {e}")
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+    @property
+    def codes(self) -> list[str]:
+        self._refresh()
+        return list(self._timelines)
+
+    def value(self, code: str, day: datetime.date | None = None) -> str | None:
+        if day is None:
+            return self.today().get(code)
+        self._refresh()
+        timeline = self._timelines.get(code)
+        return timeline.at(day) if timeline is not None else None
+
+    def _values(self, day: datetime.date) -> dict[str, str]:
+        values = {code: timeline.at(day) for code, timeline in self._timelines.items()}
+        return {code: value for code, value in values.items() if value is not None}
+
+    def values(self, day: datetime.date) -> dict[str, str]:
+        self._refresh()
+        return self._values(day)
+
+    def _next_change(self, day: datetime.date) -> datetime.date | None:
+        changes = [
+            change
+            for timeline in self._timelines.values()
+            if (change := timeline.next_change(day)) is not None
+        ]
+        return min(changes, default=None)
+
+    def next_change(self, day: datetime.date) -> datetime.date | None:
+        self._refresh()
+        return self._next_change(day)
+
+    def today(self) -> dict[str, str]:
+        self._refresh()
+        day = datetime.date.today()
+        with self._lock:
+            if self._valid_until is None or day >= self._valid_until:
+                self._today = self._values(day)
+                self._valid_until = self._next_change(day) or datetime.date.max
+            return self._today
@@ -0,0 +1,73 @@
+import csv
+import io
+import json
+from collections.abc import Iterator
+
+from pydantic import ValidationError
+
+from app.api.models.users import UserImport
+
+CSV = "text/csv"
+NDJSON = "application/x-ndjson"
+
+
+class InvalidImport(ValueError):
+    pass
+
+
+def _csv_records(text: str) -> Iterator[tuple[int, dict | str]]:
+    reader = csv.DictReader(io.StringIO(text, newline=""))
+    for record in reader:
+        if None in record:
+            yield reader.line_num, "more values than columns in the header"
+            continue
+        # Empty cells fall back to the defaults of UserImport
+        yield reader.line_num, {k: v for k, v in record.items() if v != ""}
+
+
+def _ndjson_records(text: str) -> Iterator[tuple[int, dict | str]]:
+    for line, raw in enumerate(text.splitlines(), start=1):
+        if not raw.strip():
+            continue
+        try:
+            yield line, json.loads(raw)
+        except json.JSONDecodeError as e:
+            yield line, f"invalid JSON: {e.msg}"
+
+
+def _message(error: dict) -> str:
+    location = ".".join(map(str, error["loc"]))
+    return f"{location}: {error['msg']}" if location else error["msg"]
+
+
+def parse_users(
+    body: bytes, media_type: str, max_rows: int
+) -> tuple[list[tuple[int, UserImport]], dict[int, list[str]]]:
+    """
+    Validated rows with their line numbers, and the errors of the rest.
+    CSV needs a header line with UserImport field names.
+    """
+    try:
+        text = body.decode("utf-8-sig")
+    except UnicodeDecodeError as e:
+        raise InvalidImport(f"Body is not UTF-8: {e}")
+    records = _csv_records(text) if media_type == CSV else _ndjson_records(text)
+    rows, errors = [], {}
+    for count, (line, record) in enumerate(records, start=1):
+        if count > max_rows:
+            raise InvalidImport(f"More than {max_rows} rows")
+        if isinstance(record, str):
+            errors[line] = [record]
+            continue
+        try:
+            rows.append((line, UserImport.model_validate(record)))
+        except ValidationError as e:
+            errors[line] = list(map(_message, e.errors()))
+    return rows, errors
+
+
+def import_report(created: int, errors: dict[int, list[str]]) -> dict:
+    return {
+        "created": created,
+        "errors": [{"line": line, "errors": errors[line]} for line in sorted(errors)],
+    }
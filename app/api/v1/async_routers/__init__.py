@@ -0,0 +1,9 @@
+from .admin import router as admin
+from .auth import router as auth
+from .companies import router as companies
+from .dicts import router as dicts
+from .exports import router as exports
+from .groups import router as groups
+from .roles import router as roles
+from .settings import router as settings
+from .users import router as users
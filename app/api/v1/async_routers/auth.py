@@ -0,0 +1,102 @@
+import logging
+from http import HTTPStatus
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import JSONResponse, Response
+from fastapi.security import OAuth2PasswordRequestFormStrict
+from sqlmodel import select
+
+from app.api.dependencies import (
+    AsyncSession,
+    get_async_db_connection,
+    get_password_hasher,
+    get_principal_async,
+    get_user_mask_async,
+    oauth2_scheme,
+    validate_token,
+)
+from app.api.models.users import Principal, ResponseToken
+from app.api.services import (
+    JWT,
+    AsyncPasswordHasher,
+    HashingQueueFull,
+    JwtPayload,
+)
+from app.core.database.models import Users
+
+router = APIRouter(
+    prefix="/auth",
+    tags=["Authorization"],
+)
+
+logger = logging.getLogger("app.api.v1.async_routers.auth")
+
+
+async def get_user(session: AsyncSession, username: str) -> Users | None:
+    statement = select(Users).where(Users.username == username)
+    return (await session.exec(statement)).first()
+
+
+async def authenticate_user(
+    session: AsyncSession, hasher: AsyncPasswordHasher, username: str, password: str
+) -> Users | None:
+    user = await get_user(session, username)
+    if not user:
+        return None
+    try:
+        verified = await hasher.verify_password(password, user.password)
+    except HashingQueueFull as e:
+        logger.warning(e)
+        raise HTTPException(
+            status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+            detail="Too many login attempts, try again later",
+            headers={"Retry-After": "1"},
+        )
+    if not verified:
+        return None
+    return user
+
+
+@router.post("/")
+async def get_token(
+    body: Annotated[OAuth2PasswordRequestFormStrict, Depends()],
+    session: AsyncSession = Depends(get_async_db_connection),
+    hasher: AsyncPasswordHasher = Depends(get_password_hasher),
+) -> ResponseToken:
+    logger.debug(f"Body: {body=}")
+    username = body.username.partition("@")[0]
+    logger.info(f"Username: {username=}")
+    user_exist = await authenticate_user(session, hasher, username, body.password)
+    if not user_exist:
+        raise HTTPException(
+            status_code=HTTPStatus.UNAUTHORIZED,
+            detail="Incorrect username or password",
+        )
+    acl = await get_user_mask_async(user_exist.id, session)
+    token = JWT.generate_token(JwtPayload(sub=username, user_id=user_exist.id, acl=acl))
+    return ResponseToken(access_token=token, token_type="bearer")
+
+
+@router.get("/")
+async def check_login(principal: Principal = Depends(get_principal_async)):
+    logged_in = True
+    status_code = HTTPStatus.OK
+    return JSONResponse(content={"logged_in": logged_in}, status_code=status_code)
+
+
+@router.delete("/")
+async def revoke_token(
+    token: str = Depends(oauth2_scheme),
+    payload: JwtPayload = Depends(validate_token),
+):
+    logger.info(f"Revoking token: {payload.jti=}")
+    JWT.revoke(token)
+    return Response(status_code=204)
+
+
+@router.get("/me/")
+async def read_users_me(
+    principal: Principal = Depends(get_principal_async),
+) -> Principal:
+    return principal
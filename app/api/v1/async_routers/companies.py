@@ -0,0 +1,175 @@
+import logging
+from typing import Literal
+
+from fastapi import APIRouter, Body, Depends, HTTPException, Query
+from fastapi.responses import Response
+from sqlalchemy.exc import DBAPIError
+from sqlmodel import select
+
+from app.api.dependencies import (
+    AsyncSession,
+    CompanyFilter,
+    FieldSet,
+    KeysetPage,
+    Projection,
+    Scope,
+    Streaming,
+    check_permissions,
+    get_async_db_connection,
+    get_principal_async,
+)
+from app.api.models.companies import CreateCompany
+from app.api.models.users import Principal
+from app.api.responses import FastJSONResponse
+from app.api.services import ainsert_companies
+from app.configs import get_import_settings, get_search_settings
+from app.core.database.models import Companies
+from app.core.database.search import is_timeout, search_limits, trigram_match
+
+
+async def _check_permissions(principal: Principal = Depends(get_principal_async)):
+    return check_permissions(principal, Scope.companies)
+
+
+router = APIRouter(
+    prefix="/companies", tags=["Companies"], dependencies=[Depends(_check_permissions)]
+)
+company_fields = FieldSet(Companies)
+
+SORT_KEYS = {
+    "id": (Companies.id,),
+    "created_date": (Companies.created_date, Companies.id),
+}
+
+search_settings = get_search_settings()
+SEARCH_COLUMNS = [Companies.name]
+
+import_settings = get_import_settings()
+
+logger = logging.getLogger("app.api.v1.async_routers.companies")
+
+
+async def _create_companies(
+    session: AsyncSession, creates: list[CreateCompany]
+) -> list[dict]:
+    try:
+        companies = await ainsert_companies(session, creates)
+        await session.commit()
+    except Exception as e:
+        logger.error(e)
+        await session.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+    return Projection.rows(companies)
+
+
+@router.post("/")
+async def create_company(
+    create: CreateCompany,
+    session: AsyncSession = Depends(get_async_db_connection),
+) -> dict:
+    # The company, its group and properties are committed together or not at all
+    logger.info(f"Creating company with data: {create}")
+    companies = await _create_companies(session, [create])
+    return FastJSONResponse(companies[0])
+
+
+@router.post("/bulk")
+async def create_companies(
+    creates: list[CreateCompany] = Body(
+        min_length=1, max_length=import_settings.max_rows
+    ),
+    session: AsyncSession = Depends(get_async_db_connection),
+) -> list[dict]:
+    logger.info(f"Creating {len(creates)} companies")
+    companies = await _create_companies(session, creates)
+    return FastJSONResponse(companies, status_code=201)
+
+
+@router.get("/search")
+async def search_companies(
+    q: str = Query(min_length=3, max_length=255),
+    limit: int = Query(default=search_settings.default_limit, ge=1),
+    session: AsyncSession = Depends(get_async_db_connection),
+) -> list[dict]:
+    # Declared before /{company_id}, which would otherwise match "search"
+    condition, score = trigram_match(SEARCH_COLUMNS, q)
+    statement = (
+        select(
+            Companies.id,
+            Companies.name,
+            Companies.inn,
+            Companies.kpp,
+            score.label("score"),
+        )
+        .where(condition)
+        .order_by(score.desc(), Companies.id)
+        .limit(min(limit, search_settings.max_limit))
+    )
+    try:
+        await session.exec(search_limits(search_settings))
+        companies = (await session.exec(statement)).fetchall()
+    except DBAPIError as e:
+        if not is_timeout(e):
+            raise
+        logger.warning(f"Company search timed out: {q=}")
+        raise HTTPException(
+            status_code=503, detail="Search timed out, refine the query"
+        )
+    return FastJSONResponse(Projection.rows(companies))
+
+
+@router.get("/{company_id}")
+async def get_company(
+    company_id: int,
+    projection: Projection = Depends(company_fields),
+    session: AsyncSession = Depends(get_async_db_connection),
+) -> dict:
+    logger.info(f"Getting company with id: {company_id}")
+    statement = projection.select().where(Companies.id == company_id)
+    company = (await session.exec(statement)).first()
+    if not company:
+        raise HTTPException(
+            status_code=404, detail=f"Company with id: {company_id} not found"
+        )
+    return FastJSONResponse(projection.row(company))
+
+
+@router.get("/")
+async def list_companies(
+    filters: CompanyFilter = Depends(),
+    page: KeysetPage = Depends(),
+    sort: Literal["id", "created_date"] = "id",
+    stream: Streaming = Depends(),
+    projection: Projection = Depends(company_fields),
+    session: AsyncSession = Depends(get_async_db_connection),
+) -> list[dict]:
+    keys = SORT_KEYS[sort]
+    if stream.enabled:
+        statement = (
+            filters.apply(projection.select())
+            .order_by(*keys)
+            .execution_options(**stream.options)
+        )
+        return stream.response(await session.stream(statement))
+    statement = page.apply(filters.apply(projection.select(*keys)), *keys)
+    companies = (await session.exec(statement)).fetchall()
+    return FastJSONResponse(
+        projection.rows(page.finish(companies, *keys)), headers=page.response.headers
+    )
+
+
+@router.delete("/{company_id}")
+async def delete_company(
+    company_id: int, session: AsyncSession = Depends(get_async_db_connection)
+):
+    logger.info(f"Deleting company with id: {company_id}")
+    statement = select(Companies).where(Companies.id == company_id)
+    company = (await session.exec(statement)).first()
+    if company:
+        await session.delete(company)
+        await session.commit()
+    else:
+        raise HTTPException(
+            status_code=404, detail=f"Company with id: {company_id} not found"
+        )
+    return Response(status_code=204)
@@ -0,0 +1,43 @@
+import logging
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Request
+
+from app.api.dependencies import (
+    AsyncSession,
+    KeysetPage,
+    get_async_db_connection,
+    get_principal_async,
+    reference_cache,
+    reference_response,
+)
+
+router = APIRouter(
+    prefix="/dicts",
+    tags=["Dicts"],
+    dependencies=[Depends(get_principal_async)],
+)
+
+MODELS = {model.__tablename__: model for model in reference_cache.models}
+
+logger = logging.getLogger("app.api.v1.async_routers.dicts")
+
+
+@router.get("/{table}")
+async def list_dict(
+    request: Request,
+    table: Literal[
+        "functions_dict",
+        "property_code_dict",
+        "roles_dict",
+        "settings_dict",
+        "shablon_dict",
+        "status_dict",
+        "timezone_dict",
+    ],
+    page: KeysetPage = Depends(),
+    session: AsyncSession = Depends(get_async_db_connection),
+) -> list[dict]:
+    model = MODELS[table]
+    loaded = reference_cache.get(model) or await reference_cache.aload(session, model)
+    return reference_response(request, page, loaded, model.id)
@@ -0,0 +1,49 @@
+import logging
+from typing import Literal
+
+from fastapi import APIRouter, Depends
+from sqlmodel import SQLModel
+
+from app.api.dependencies import (
+    AsyncSession,
+    Export,
+    Scope,
+    check_permissions,
+    get_async_db_connection,
+    get_principal_async,
+)
+from app.api.models.users import Principal
+from app.core.database.bulk import acopy_out, export_sql
+from app.core.database.models import Companies, Settings, UserGroups, Users
+
+
+async def _check_permissions(principal: Principal = Depends(get_principal_async)):
+    return check_permissions(principal, Scope.export_data)
+
+
+router = APIRouter(
+    prefix="/export",
+    tags=["Export"],
+    dependencies=[Depends(_check_permissions)],
+)
+
+TABLES: dict[str, tuple[type[SQLModel], set[str]]] = {
+    "companies": (Companies, set()),
+    "users": (Users, {"password"}),
+    "groups": (UserGroups, set()),
+    "settings": (Settings, set()),
+}
+
+logger = logging.getLogger("app.api.v1.async_routers.exports")
+
+
+@router.get("/{table}")
+async def export_table(
+    table: Literal["companies", "users", "groups", "settings"],
+    export: Export = Depends(),
+    session: AsyncSession = Depends(get_async_db_connection),
+):
+    logger.info(f"Exporting {table} as {export.format}")
+    model, exclude = TABLES[table]
+    sql = export_sql(model, export.format, exclude)
+    return export.response(acopy_out(session, sql), table)
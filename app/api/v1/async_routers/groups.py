@@ -0,0 +1,126 @@
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import JSONResponse
+from sqlmodel import select
+
+from app.api.dependencies import (
+    AsyncSession,
+    FieldSet,
+    KeysetPage,
+    Projection,
+    Scope,
+    check_permissions,
+    get_async_db_connection,
+    get_principal_async,
+    validate_token,
+)
+from app.api.models.users import Principal
+from app.api.responses import FastJSONResponse
+from app.api.services.jwt import JwtPayload
+from app.core.database.models import Companies, UserGroups, Users
+
+
+async def _check_permissions(principal: Principal = Depends(get_principal_async)):
+    return check_permissions(principal, Scope.groups)
+
+
+router = APIRouter(
+    prefix="/groups",
+    tags=["Groups"],
+    dependencies=[Depends(_check_permissions)],
+)
+
+group_fields = FieldSet(UserGroups)
+
+logger = logging.getLogger("app.api.v1.async_routers.groups")
+
+
+@router.post("/")
+async def create_user_group(
+    group: UserGroups, session: AsyncSession = Depends(get_async_db_connection)
+):
+    logger.info(f"{group=}")
+    company_exists = (
+        await session.exec(select(Companies).where(Companies.id == group.company_id))
+    ).first()
+    if not company_exists:
+        raise HTTPException(
+            status_code=404, detail=f"Company with id: {group.company_id} not found"
+        )
+    try:
+        session.add(group)
+        await session.commit()
+        await session.refresh(group)
+    except Exception as e:
+        logger.error(e)
+        await session.rollback()
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+    return JSONResponse(
+        status_code=201,
+        content={"id": f"{group.id}"},
+    )
+
+
+@router.get("/")
+async def list_user_groups(
+    page: KeysetPage = Depends(),
+    projection: Projection = Depends(group_fields),
+    session: AsyncSession = Depends(get_async_db_connection),
+) -> list[dict]:
+    statement = page.apply(projection.select(), UserGroups.id)
+    groups = (await session.exec(statement)).fetchall()
+    return FastJSONResponse(
+        projection.rows(page.finish(groups, UserGroups.id)),
+        headers=page.response.headers,
+    )
+
+
+@router.get("/my")
+async def list_my_groups(
+    token: JwtPayload = Depends(validate_token),
+    projection: Projection = Depends(group_fields),
+    session: AsyncSession = Depends(get_async_db_connection),
+) -> list[dict]:
+    logger.info(f"Listing groups for user with id: {token.user_id}")
+    statement = projection.select().join(Users).where(Users.id == token.user_id)
+    return FastJSONResponse(projection.rows((await session.exec(statement)).fetchall()))
+
+
+@router.put("/{user_id}")
+async def add_user_to_group(
+    user_id: int,
+    group_id: int,
+    session: AsyncSession = Depends(get_async_db_connection),
+):
+    logger.info(f"Adding user with id: {user_id} to group with id: {group_id}")
+
+    statement = select(UserGroups).where(UserGroups.id == group_id)
+    group = (await session.exec(statement)).first()
+    if not group:
+        raise HTTPException(
+            status_code=404, detail=f"Group with id: {group_id} not found"
+        )
+    if group.company_id is None:
+        raise HTTPException(
+            status_code=400, detail="Group does not belong to a company"
+        )
+
+    user = (await session.exec(select(Users).where(Users.id == user_id))).first()
+    logger.info(f"{user=}")
+    if not user:
+        raise HTTPException(
+            status_code=404, detail=f"User with id: {user_id} not found"
+        )
+    user.group_id = group_id
+    try:
+        session.add(user)
+        await session.commit()
+    except Exception as e:
+        logger.error(e)
+        await session.rollback()
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+    return JSONResponse(
+        status_code=201,
+        content={"id": f"{group.id}"},
+    )
@@ -0,0 +1,171 @@
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import JSONResponse, Response
+from sqlmodel import select
+
+from app.api.dependencies import (
+    AsyncSession,
+    KeysetPage,
+    Scope,
+    check_permissions,
+    get_async_db_connection,
+    get_principal_async,
+    permission_cache,
+    reference_cache,
+    reference_response,
+    validate_token,
+)
+from app.api.models.users import Principal
+from app.api.services.jwt import JwtPayload
+from app.core.database.models import FunctionsDict, RoleFunctions, RolesDict, UserRoles
+
+
+async def _check_permissions(principal: Principal = Depends(get_principal_async)):
+    return check_permissions(principal, Scope.roles)
+
+
+router = APIRouter(
+    prefix="/roles",
+    tags=["Roles"],
+    dependencies=[Depends(_check_permissions)],
+)
+
+logger = logging.getLogger("app.api.v1.async_routers.roles")
+
+
+@router.post("/")
+async def assign_role_to_user(
+    role: UserRoles, session: AsyncSession = Depends(get_async_db_connection)
+):
+    logger.info(f"{role=}")
+    try:
+        session.add(role)
+        await session.commit()
+        await session.refresh(role)
+    except Exception as e:
+        logger.error(e)
+        await session.rollback()
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+    permission_cache.invalidate_user(role.user_id)
+    return JSONResponse(
+        status_code=201,
+        content={"id": f"{role.id}"},
+    )
+
+
+@router.get("/{role_id}/functions")
+async def list_functions_of_role(
+    role_id: int,
+    session: AsyncSession = Depends(get_async_db_connection),
+) -> list[FunctionsDict]:
+    return (
+        await session.exec(
+            select(FunctionsDict)
+            .join(RoleFunctions)
+            .join(RolesDict, RolesDict.id == RoleFunctions.role_id)
+            .where(RoleFunctions.role_id == role_id)
+        )
+    ).fetchall()
+
+
+@router.delete("/{role_id}/{function_id}")
+async def remove_user_role_to_function(
+    role_id: int,
+    function_id: int,
+    session: AsyncSession = Depends(get_async_db_connection),
+) -> Response:
+    role_function = (
+        await session.exec(
+            select(RoleFunctions).where(
+                (RoleFunctions.role_id == role_id)
+                & (RoleFunctions.function_code_id == function_id)
+            )
+        )
+    ).first()
+    await session.delete(role_function)
+    await session.commit()
+    permission_cache.invalidate_role(role_id)
+    return Response(status_code=204)
+
+
+@router.patch(
+    "/{role_id}",
+    description=(
+        "Назначить роли пользователя (Admin) права на функцю "
+        "(manage_users - управление пользователей)"
+    ),
+)
+async def assign_user_role_to_function(
+    role_id: int,
+    function_id: int,
+    session: AsyncSession = Depends(get_async_db_connection),
+):
+    role = (
+        await session.exec(select(RolesDict).where(RolesDict.id == role_id))
+    ).first()
+    if not role:
+        raise HTTPException(status_code=404, detail=f"Role {role_id} not found")
+
+    function = (
+        await session.exec(select(FunctionsDict).where(FunctionsDict.id == function_id))
+    ).first()
+    if not function:
+        raise HTTPException(status_code=404, detail=f"Function {function_id} not found")
+
+    role_function = (
+        await session.exec(
+            select(RoleFunctions).where(
+                (RoleFunctions.role_id == role.id)
+                & (RoleFunctions.function_code_id == function.id)
+            )
+        )
+    ).first()
+    if role_function:
+        raise HTTPException(status_code=409, detail="Role already assigned")
+
+    role_function = RoleFunctions(role_id=role_id, function_code_id=function_id)
+    session.add(role_function)
+    await session.commit()
+    await session.refresh(role_function)
+    permission_cache.invalidate_role(role_id)
+    return JSONResponse(
+        status_code=201,
+        content={"id": f"{role_function.id}"},
+    )
+
+
+@router.get("/my")
+async def list_my_roles(
+    token: JwtPayload = Depends(validate_token),
+    session: AsyncSession = Depends(get_async_db_connection),
+) -> list[RolesDict]:
+    return (
+        await session.exec(
+            select(RolesDict).join(UserRoles).where(UserRoles.user_id == token.user_id)
+        )
+    ).fetchall()
+
+
+@router.get("/")
+async def list_roles(
+    request: Request,
+    page: KeysetPage = Depends(),
+    session: AsyncSession = Depends(get_async_db_connection),
+) -> list[RolesDict]:
+    table = reference_cache.get(RolesDict) or await reference_cache.aload(
+        session, RolesDict
+    )
+    return reference_response(request, page, table, RolesDict.id)
+
+
+@router.get("/functions")
+async def list_functions(
+    request: Request,
+    page: KeysetPage = Depends(),
+    session: AsyncSession = Depends(get_async_db_connection),
+) -> list[FunctionsDict]:
+    table = reference_cache.get(FunctionsDict) or await reference_cache.aload(
+        session, FunctionsDict
+    )
+    return reference_response(request, page, table, FunctionsDict.id)
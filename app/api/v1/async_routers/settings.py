@@ -0,0 +1,176 @@
+import datetime
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import JSONResponse, Response
+from sqlmodel import select
+
+from app.api.dependencies import (
+    AsyncSession,
+    FieldSet,
+    KeysetPage,
+    Projection,
+    Scope,
+    check_permissions,
+    get_async_db_connection,
+    get_principal_async,
+    reference_cache,
+    reference_response,
+    settings_resolver,
+)
+from app.api.models.users import Principal
+from app.api.responses import FastJSONResponse
+from app.core.database.models import Settings, SettingsDict
+
+
+async def _check_permissions(principal: Principal = Depends(get_principal_async)):
+    return check_permissions(principal, Scope.settings)
+
+
+router = APIRouter(
+    prefix="/settings",
+    tags=["Settings"],
+    dependencies=[Depends(_check_permissions)],
+)
+
+setting_fields = FieldSet(Settings)
+
+logger = logging.getLogger("app.api.v1.async_routers.settings")
+
+
+@router.post("/")
+async def add_setting(
+    setting: Settings, session: AsyncSession = Depends(get_async_db_connection)
+):
+    logger.debug(f"{setting=}")
+    try:
+        session.add(setting)
+        await session.commit()
+        await session.refresh(setting)
+    except Exception as e:
+        logger.error(e)
+        await session.rollback()
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+    settings_resolver.invalidate()
+    return JSONResponse(
+        status_code=201,
+        content={"id": f"{setting.id}"},
+    )
+
+
+@router.patch("/{setting_id}")
+async def update_setting(
+    setting: Settings, session: AsyncSession = Depends(get_async_db_connection)
+):
+    logger.debug(f"{setting=}")
+    if setting.id is None:
+        raise HTTPException(status_code=400, detail="Setting id is required to update")
+
+    setting_exist = (
+        await session.exec(select(Settings).where(Settings.id == setting.id))
+    ).first()
+    if not setting_exist:
+        raise HTTPException(
+            status_code=404, detail=f"Settings with id: {setting.id} not found"
+        )
+    try:
+        setting_exist.code = setting.code
+        setting_exist.name = setting.name
+        session.add(setting_exist)
+        await session.commit()
+        await session.refresh(setting_exist)
+    except Exception as e:
+        logger.error(e)
+        await session.rollback()
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+    settings_resolver.invalidate()
+    return JSONResponse(
+        status_code=202,
+        content={"id": f"{setting_exist.id}"},
+    )
+
+
+@router.get("/dict")
+async def list_settings_dict(
+    request: Request,
+    page: KeysetPage = Depends(),
+    session: AsyncSession = Depends(get_async_db_connection),
+) -> list[SettingsDict]:
+    table = reference_cache.get(SettingsDict) or await reference_cache.aload(
+        session, SettingsDict
+    )
+    return reference_response(request, page, table, SettingsDict.id)
+
+
+@router.get("/")
+async def list_settings(
+    page: KeysetPage = Depends(),
+    projection: Projection = Depends(setting_fields),
+    session: AsyncSession = Depends(get_async_db_connection),
+) -> list[dict]:
+    statement = page.apply(projection.select(), Settings.id)
+    settings = (await session.exec(statement)).fetchall()
+    return FastJSONResponse(
+        projection.rows(page.finish(settings, Settings.id)),
+        headers=page.response.headers,
+    )
+
+
+@router.get("/effective")
+async def get_effective_settings(
+    code: str | None = None,
+    at: datetime.date | None = None,
+    session: AsyncSession = Depends(get_async_db_connection),
+) -> dict:
+    """Values in effect on `at` (today by default) and the day the next one changes"""
+    # Declared before /{settings_id}, which would otherwise match "effective"
+    if settings_resolver.stale:
+        await settings_resolver.aload(session)
+    day = at or datetime.date.today()
+    values = settings_resolver.today() if at is None else settings_resolver.values(day)
+    if code is not None:
+        if code not in settings_resolver.codes:
+            raise HTTPException(status_code=404, detail=f"Setting {code} not found")
+        values = {code: values[code]} if code in values else {}
+    return FastJSONResponse(
+        {
+            "at": day,
+            "values": values,
+            "next_change": settings_resolver.next_change(day),
+        }
+    )
+
+
+@router.get("/{settings_id}")
+async def get_settings(
+    settings_id: int,
+    projection: Projection = Depends(setting_fields),
+    session: AsyncSession = Depends(get_async_db_connection),
+) -> dict:
+    statement = projection.select().where(Settings.id == settings_id)
+    settings = (await session.exec(statement)).first()
+    if not settings:
+        raise HTTPException(
+            status_code=404, detail=f"Settings with id: {settings_id} not found"
+        )
+    return FastJSONResponse(projection.row(settings))
+
+
+@router.delete("/{setting_id}")
+async def delete_settings(
+    setting_id: int,
+    session: AsyncSession = Depends(get_async_db_connection),
+):
+    logger.debug(f"{setting_id=}")
+
+    setting_exist = (
+        await session.exec(select(Settings).where(Settings.id == setting_id))
+    ).first()
+    if not setting_exist:
+        raise HTTPException(
+            status_code=404, detail=f"Settings with id: {setting_id} not found"
+        )
+    await session.delete(setting_exist)
+    await session.commit()
+    settings_resolver.invalidate()
+    return Response(status_code=204)
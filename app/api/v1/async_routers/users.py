@@ -0,0 +1,253 @@
+import logging
+from http import HTTPStatus
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse, Response
+from sqlalchemy.exc import DBAPIError
+from sqlmodel import select
+
+from app.api.dependencies import (
+    AsyncSession,
+    FieldSet,
+    KeysetPage,
+    Projection,
+    Scope,
+    Streaming,
+    check_permissions,
+    get_async_db_connection,
+    get_password_hasher,
+    get_principal_async,
+    import_body,
+    permission_cache,
+)
+from app.api.models.users import Principal
+from app.api.responses import FastJSONResponse
+from app.api.services import (
+    AsyncPasswordHasher,
+    HashingQueueFull,
+    InvalidImport,
+    import_report,
+    parse_users,
+)
+from app.configs import get_import_settings, get_search_settings
+from app.core.database.bulk import amerge_users, astage_users
+from app.core.database.models import Users
+from app.core.database.search import is_timeout, search_limits, trigram_match
+
+router = APIRouter(prefix="/users", tags=["Users"])
+
+# Password hashes are never read back
+user_fields = FieldSet(Users, exclude={"password"})
+
+SORT_KEYS = {
+    "id": (Users.id,),
+    "created_date": (Users.created_date, Users.id),
+}
+
+search_settings = get_search_settings()
+import_settings = get_import_settings()
+SEARCH_COLUMNS = [Users.lastname, Users.firtsname, Users.username]
+
+logger = logging.getLogger("app.api.v1.async_routers.users")
+
+
+async def _check_permissions(principal: Principal = Depends(get_principal_async)):
+    return check_permissions(principal, Scope.users)
+
+
+async def _check_import_permissions(
+    principal: Principal = Depends(get_principal_async),
+):
+    return check_permissions(principal, Scope.import_data)
+
+
+@router.post("/")
+async def create_user(
+    user: Users,
+    session: AsyncSession = Depends(get_async_db_connection),
+    hasher: AsyncPasswordHasher = Depends(get_password_hasher),
+):
+    logger.debug(f"{user=}")
+    try:
+        user.password = await hasher.hash_password(user.password)
+    except HashingQueueFull as e:
+        logger.warning(e)
+        raise HTTPException(
+            status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+            detail="Password hashing is overloaded, try again later",
+            headers={"Retry-After": "1"},
+        )
+    try:
+        session.add(user)
+        await session.commit()
+        await session.refresh(user)
+    except Exception as e:
+        logger.error(e)
+        await session.rollback()
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+    return JSONResponse(
+        status_code=201,
+        content={"id": f"{user.id}"},
+    )
+
+
+async def _import_users(
+    session: AsyncSession, rows: list, hashes: list[str], skip_invalid: bool
+) -> tuple[int, dict[int, list[str]]]:
+    try:
+        # Checked again, the tables may have changed while hashing
+        errors = await astage_users(session, rows, hashes)
+        if errors and not skip_invalid:
+            await session.rollback()
+            return 0, errors
+        created = await amerge_users(session, errors)
+        await session.commit()
+    except Exception as e:
+        logger.error(e)
+        await session.rollback()
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+    return created, errors
+
+
+@router.post("/import")
+async def import_users(
+    # Declared first: dependencies are solved in order, so the grant is
+    # checked before the body is read
+    permissions: bool = Depends(_check_import_permissions),
+    upload: tuple[str, bytes] = Depends(import_body),
+    skip_invalid: bool = Query(
+        default=False, description="Import the valid rows when some rows fail"
+    ),
+    session: AsyncSession = Depends(get_async_db_connection),
+    hasher: AsyncPasswordHasher = Depends(get_password_hasher),
+):
+    """
+    CSV (with a header line) or NDJSON body of users. Nothing is imported if
+    any row fails, unless skip_invalid is set; failing rows are returned
+    with their line numbers either way.
+    """
+    media_type, body = upload
+    try:
+        rows, errors = parse_users(body, media_type, import_settings.max_rows)
+    except InvalidImport as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if rows:
+        # Nothing is kept: this only finds bad rows before hashing passwords
+        try:
+            errors |= await astage_users(session, rows)
+        finally:
+            await session.rollback()
+        rows = [row for row in rows if row[0] not in errors]
+    if not rows or (errors and not skip_invalid):
+        return JSONResponse(
+            status_code=422 if errors else 200, content=import_report(0, errors)
+        )
+    hashes = await hasher.hash_many(
+        [user.password.get_secret_value() for _, user in rows]
+    )
+    created, found = await _import_users(session, rows, hashes, skip_invalid)
+    errors |= found
+    return JSONResponse(
+        status_code=201 if created else 422, content=import_report(created, errors)
+    )
+
+
+@router.get("/")
+async def list_users(
+    page: KeysetPage = Depends(),
+    sort: Literal["id", "created_date"] = "id",
+    stream: Streaming = Depends(),
+    projection: Projection = Depends(user_fields),
+    session: AsyncSession = Depends(get_async_db_connection),
+    permissions: bool = Depends(_check_permissions),
+) -> list[dict]:
+    logger.info(f"{permissions=}")
+    keys = SORT_KEYS[sort]
+    if stream.enabled:
+        statement = (
+            projection.select().order_by(*keys).execution_options(**stream.options)
+        )
+        return stream.response(await session.stream(statement))
+    statement = page.apply(projection.select(*keys), *keys)
+    try:
+        users = (await session.exec(statement)).fetchall()
+    except Exception as e:
+        logger.error(e)
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+    return FastJSONResponse(
+        projection.rows(page.finish(users, *keys)), headers=page.response.headers
+    )
+
+
+@router.get("/search")
+async def search_users(
+    q: str = Query(min_length=3, max_length=255),
+    limit: int = Query(default=search_settings.default_limit, ge=1),
+    session: AsyncSession = Depends(get_async_db_connection),
+    permissions: bool = Depends(_check_permissions),
+) -> list[dict]:
+    # Declared before /{user_id}, which would otherwise match "search"
+    condition, score = trigram_match(SEARCH_COLUMNS, q)
+    statement = (
+        select(
+            Users.id,
+            Users.company_id,
+            Users.username,
+            Users.lastname,
+            Users.firtsname,
+            Users.patronymic,
+            score.label("score"),
+        )
+        .where(condition)
+        .order_by(score.desc(), Users.id)
+        .limit(min(limit, search_settings.max_limit))
+    )
+    try:
+        await session.exec(search_limits(search_settings))
+        users = (await session.exec(statement)).fetchall()
+    except DBAPIError as e:
+        if not is_timeout(e):
+            raise
+        logger.warning(f"User search timed out: {q=}")
+        raise HTTPException(
+            status_code=503, detail="Search timed out, refine the query"
+        )
+    return FastJSONResponse(Projection.rows(users))
+
+
+@router.get("/{user_id}")
+async def get_user(
+    user_id: int,
+    projection: Projection = Depends(user_fields),
+    session: AsyncSession = Depends(get_async_db_connection),
+    permissions: bool = Depends(_check_permissions),
+) -> dict:
+    logger.info(f"Getting user with id: {user_id}")
+    statement = projection.select().where(Users.id == user_id)
+    user = (await session.exec(statement)).first()
+    if not user:
+        raise HTTPException(
+            status_code=404, detail=f"User with id: {user_id} not found"
+        )
+    return FastJSONResponse(projection.row(user))
+
+
+@router.delete("/{user_id}")
+async def delete_user(
+    user_id: int,
+    session: AsyncSession = Depends(get_async_db_connection),
+    permissions: bool = Depends(_check_permissions),
+):
+    logger.info(f"Deleting user with id: {user_id}")
+    statement = select(Users).where(Users.id == user_id)
+    user = (await session.exec(statement)).first()
+    if user:
+        await session.delete(user)
+        await session.commit()
+        permission_cache.invalidate_user(user_id)
+    else:
+        raise HTTPException(
+            status_code=404, detail=f"User with id: {user_id} not found"
+        )
+    return Response(status_code=204)
@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+
+from app.api.dependencies import Scope, check_permissions, get_principal
+from app.api.models.users import Principal
+from app.core.database.slow_queries import slow_query_log
+from app.core.profiler import profiler
+
+
+def _check_permissions(principal: Principal = Depends(get_principal)):
+    return check_permissions(principal, Scope.admin)
+
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["Admin"],
+    dependencies=[Depends(_check_permissions)],
+)
+
+
+@router.get("/slow-queries")
+def slow_queries():
+    # Latest EXPLAIN (ANALYZE, BUFFERS) plans first
+    return slow_query_log.metrics()
+
+
+@router.get("/profiles")
+def list_profiles():
+    # Newest first: requests sent with the X-Profile header or sampled by routes
+    return profiler.store.list()
+
+
+@router.get("/profiles/{name}")
+def download_profile(name: str):
+    path = profiler.store.path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"Profile {name} not found")
+    return FileResponse(path, media_type="application/octet-stream", filename=name)
@@ -3,21 +3,27 @@ from http import HTTPStatus
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.security import OAuth2PasswordRequestFormStrict
 from sqlmodel import select
+from starlette.concurrency import run_in_threadpool
 
 from app.api.dependencies import (
     Session,
     get_db_connection,
+    get_password_hasher,
+    get_principal,
+    get_user_mask,
+    oauth2_scheme,
     validate_token,
     validate_user,
 )
-from app.api.models.users import ResponseToken
+from app.api.models.users import Principal, ResponseToken
 from app.api.services import (
     JWT,
+    AsyncPasswordHasher,
+    HashingQueueFull,
     JwtPayload,
-    PasswordHasher,
 )
 from app.core.database.models import Users
 
@@ -34,30 +40,43 @@ def get_user(session: Session, username: str) -> Users | None:
     return session.exec(statement).first()
 
 
-def authenticate_user(session: Session, username: str, password: str) -> Users | None:
-    user = get_user(session, username)
+async def authenticate_user(
+    session: Session, hasher: AsyncPasswordHasher, username: str, password: str
+) -> Users | None:
+    user = await run_in_threadpool(get_user, session, username)
     if not user:
         return None
-    if not PasswordHasher.verify_password(password, user.password):
+    try:
+        verified = await hasher.verify_password(password, user.password)
+    except HashingQueueFull as e:
+        logger.warning(e)
+        raise HTTPException(
+            status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+            detail="Too many login attempts, try again later",
+            headers={"Retry-After": "1"},
+        )
+    if not verified:
         return None
     return user
 
 
 @router.post("/")
-def get_token(
+async def get_token(
     body: Annotated[OAuth2PasswordRequestFormStrict, Depends()],
     session: Session = Depends(get_db_connection),
+    hasher: AsyncPasswordHasher = Depends(get_password_hasher),
 ) -> ResponseToken:
     logger.debug(f"Body: {body=}")
     username = body.username.partition("@")[0]
     logger.info(f"Username: {username=}")
-    user_exist = authenticate_user(session, username, body.password)
+    user_exist = await authenticate_user(session, hasher, username, body.password)
     if not user_exist:
         raise HTTPException(
             status_code=HTTPStatus.UNAUTHORIZED,
             detail="Incorrect username or password",
         )
-    token = JWT.generate_token(JwtPayload(sub=username, user_id=user_exist.id))
+    acl = await run_in_threadpool(get_user_mask, user_exist.id, session)
+    token = JWT.generate_token(JwtPayload(sub=username, user_id=user_exist.id, acl=acl))
     return ResponseToken(access_token=token, token_type="bearer")
 
 
@@ -68,13 +87,16 @@ def check_login(token: JwtPayload = Depends(validate_user)):
     return JSONResponse(content={"logged_in": logged_in}, status_code=status_code)
 
 
-@router.get("/me/")
-def read_users_me(
-    session: Session = Depends(get_db_connection),
-    token: JwtPayload = Depends(validate_token),
+@router.delete("/")
+def revoke_token(
+    token: str = Depends(oauth2_scheme),
+    payload: JwtPayload = Depends(validate_token),
 ):
-    statement = select(Users).where(Users.id == token.user_id)
-    user = session.exec(statement).first()
-    if user and user.user_lock:
-        raise HTTPException(status_code=400, detail="Inactive user")
-    return user
+    logger.info(f"Revoking token: {payload.jti=}")
+    JWT.revoke(token)
+    return Response(status_code=204)
+
+
+@router.get("/me/")
+def read_users_me(principal: Principal = Depends(get_principal)) -> Principal:
+    return principal
@@ -1,87 +1,159 @@
 import logging
+from typing import Literal
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Body, Depends, HTTPException, Query
 from fastapi.responses import Response
+from sqlalchemy.exc import DBAPIError
 from sqlmodel import select
 
 from app.api.dependencies import (
+    CompanyFilter,
+    FieldSet,
+    KeysetPage,
+    Projection,
     Scope,
     Session,
+    Streaming,
     check_permissions,
     get_db_connection,
-    validate_user,
+    get_principal,
 )
 from app.api.models.companies import CreateCompany
-from app.core.database.models import Companies, UserGroups
+from app.api.models.users import Principal
+from app.api.responses import FastJSONResponse
+from app.api.services import insert_companies
+from app.configs import get_import_settings, get_search_settings
+from app.core.database.models import Companies
+from app.core.database.search import is_timeout, search_limits, trigram_match
 
 
-def _check_permissions(
-    user_id: int = Depends(validate_user),
-    session: Session = Depends(get_db_connection),
-):
-    return check_permissions(user_id, Scope.companies, session)
+def _check_permissions(principal: Principal = Depends(get_principal)):
+    return check_permissions(principal, Scope.companies)
 
 
 router = APIRouter(
     prefix="/companies", tags=["Companies"], dependencies=[Depends(_check_permissions)]
 )
+company_fields = FieldSet(Companies)
+
+SORT_KEYS = {
+    "id": (Companies.id,),
+    "created_date": (Companies.created_date, Companies.id),
+}
+
+search_settings = get_search_settings()
+SEARCH_COLUMNS = [Companies.name]
+
+import_settings = get_import_settings()
+
 logger = logging.getLogger("app.api.v1.routers.companies")
 
 
-@router.post("/")
-def create_company(
-    create: CreateCompany,
-    session: Session = Depends(get_db_connection),
-) -> Companies:
-    logger.info(f"Creating company with data: {create}")
+def _create_companies(session: Session, creates: list[CreateCompany]) -> list[dict]:
     try:
-        session.add(create.company)
+        companies = insert_companies(session, creates)
         session.commit()
-        session.refresh(create.company)
     except Exception as e:
         logger.error(e)
         session.rollback()
         raise HTTPException(status_code=500, detail=str(e))
+    return Projection.rows(companies)
+
+
+@router.post("/")
+def create_company(
+    create: CreateCompany,
+    session: Session = Depends(get_db_connection),
+) -> dict:
+    # The company, its group and properties are committed together or not at all
+    logger.info(f"Creating company with data: {create}")
+    companies = _create_companies(session, [create])
+    return FastJSONResponse(companies[0])
 
-    if create.user_group is None:
-        create.user_group = UserGroups(
-            company_id=create.company.id,
-            group_name=create.company.name,
-            comment="Default group",
+
+@router.post("/bulk")
+def create_companies(
+    creates: list[CreateCompany] = Body(
+        min_length=1, max_length=import_settings.max_rows
+    ),
+    session: Session = Depends(get_db_connection),
+) -> list[dict]:
+    logger.info(f"Creating {len(creates)} companies")
+    companies = _create_companies(session, creates)
+    return FastJSONResponse(companies, status_code=201)
+
+
+@router.get("/search")
+def search_companies(
+    q: str = Query(min_length=3, max_length=255),
+    limit: int = Query(default=search_settings.default_limit, ge=1),
+    session: Session = Depends(get_db_connection),
+) -> list[dict]:
+    # Declared before /{company_id}, which would otherwise match "search"
+    condition, score = trigram_match(SEARCH_COLUMNS, q)
+    statement = (
+        select(
+            Companies.id,
+            Companies.name,
+            Companies.inn,
+            Companies.kpp,
+            score.label("score"),
         )
-    logger.info(f"{create.user_group=}")
+        .where(condition)
+        .order_by(score.desc(), Companies.id)
+        .limit(min(limit, search_settings.max_limit))
+    )
     try:
-        session.add(create.user_group)
-        session.commit()
-    except Exception as e:
-        logger.error(e)
-        session.rollback()
-        session.delete(create.company)
-        session.commit()
-        raise HTTPException(status_code=500, detail=str(e))
-    session.refresh(create.company)
-    return create.company
+        session.exec(search_limits(search_settings))
+        companies = session.exec(statement).fetchall()
+    except DBAPIError as e:
+        if not is_timeout(e):
+            raise
+        logger.warning(f"Company search timed out: {q=}")
+        raise HTTPException(
+            status_code=503, detail="Search timed out, refine the query"
+        )
+    return FastJSONResponse(Projection.rows(companies))
 
 
 @router.get("/{company_id}")
 def get_company(
-    company_id: int, session: Session = Depends(get_db_connection)
-) -> Companies:
+    company_id: int,
+    projection: Projection = Depends(company_fields),
+    session: Session = Depends(get_db_connection),
+) -> dict:
     logger.info(f"Getting company with id: {company_id}")
-    statement = select(Companies).where(Companies.id == company_id)
+    statement = projection.select().where(Companies.id == company_id)
     company = session.exec(statement).first()
     if not company:
         raise HTTPException(
             status_code=404, detail=f"Company with id: {company_id} not found"
         )
-    return company
+    return FastJSONResponse(projection.row(company))
 
 
 @router.get("/")
-def list_companies(session: Session = Depends(get_db_connection)) -> list[Companies]:
-    statement = select(Companies)
+def list_companies(
+    filters: CompanyFilter = Depends(),
+    page: KeysetPage = Depends(),
+    sort: Literal["id", "created_date"] = "id",
+    stream: Streaming = Depends(),
+    projection: Projection = Depends(company_fields),
+    session: Session = Depends(get_db_connection),
+) -> list[dict]:
+    keys = SORT_KEYS[sort]
+    if stream.enabled:
+        statement = (
+            filters.apply(projection.select())
+            .order_by(*keys)
+            .execution_options(**stream.options)
+        )
+        return stream.response(session.exec(statement))
+    statement = page.apply(filters.apply(projection.select(*keys)), *keys)
     companies = session.exec(statement).fetchall()
-    return companies
+    return FastJSONResponse(
+        projection.rows(page.finish(companies, *keys)), headers=page.response.headers
+    )
 
 
 # @router.put("/{company_id}")
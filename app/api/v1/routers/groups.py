@@ -5,22 +5,24 @@ from fastapi.responses import JSONResponse
 from sqlmodel import select
 
 from app.api.dependencies import (
+    FieldSet,
+    KeysetPage,
+    Projection,
     Scope,
     Session,
     check_permissions,
     get_db_connection,
+    get_principal,
     validate_token,
-    validate_user,
 )
+from app.api.models.users import Principal
+from app.api.responses import FastJSONResponse
 from app.api.services.jwt import JwtPayload
 from app.core.database.models import Companies, UserGroups, Users
 
 
-def _check_permissions(
-    user_id: int = Depends(validate_user),
-    session: Session = Depends(get_db_connection),
-):
-    return check_permissions(user_id, Scope.groups, session)
+def _check_permissions(principal: Principal = Depends(get_principal)):
+    return check_permissions(principal, Scope.groups)
 
 
 router = APIRouter(
@@ -29,6 +31,8 @@ router = APIRouter(
     dependencies=[Depends(_check_permissions)],
 )
 
+group_fields = FieldSet(UserGroups)
+
 logger = logging.getLogger("app.api.v1.routers.groups")
 
 
@@ -57,20 +61,29 @@ def create_user_group(group: UserGroups, session: Session = Depends(get_db_conne
 
 
 @router.get("/")
-def list_user_groups(session: Session = Depends(get_db_connection)) -> list[UserGroups]:
-    return session.exec(select(UserGroups)).fetchall()
+def list_user_groups(
+    page: KeysetPage = Depends(),
+    projection: Projection = Depends(group_fields),
+    session: Session = Depends(get_db_connection),
+) -> list[dict]:
+    statement = page.apply(projection.select(), UserGroups.id)
+    groups = session.exec(statement).fetchall()
+    return FastJSONResponse(
+        projection.rows(page.finish(groups, UserGroups.id)),
+        headers=page.response.headers,
+    )
 
 
 # По идее табличка user_groups должна быть many-to-many с user и group...
 @router.get("/my")
 def list_my_groups(
     token: JwtPayload = Depends(validate_token),
+    projection: Projection = Depends(group_fields),
     session: Session = Depends(get_db_connection),
-) -> list[UserGroups]:
+) -> list[dict]:
     print(f"Listing groups for user with id: {token.user_id}")
-    return session.exec(
-        select(UserGroups).join(Users).where(Users.id == token.user_id)
-    ).fetchall()
+    statement = projection.select().join(Users).where(Users.id == token.user_id)
+    return FastJSONResponse(projection.rows(session.exec(statement).fetchall()))
 
 
 @router.put("/{user_id}")
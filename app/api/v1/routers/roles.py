@@ -1,26 +1,28 @@
 import logging
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import JSONResponse, Response
 from sqlmodel import select
 
 from app.api.dependencies import (
+    KeysetPage,
     Scope,
     Session,
     check_permissions,
     get_db_connection,
+    get_principal,
+    permission_cache,
+    reference_cache,
+    reference_response,
     validate_token,
-    validate_user,
 )
+from app.api.models.users import Principal
 from app.api.services.jwt import JwtPayload
 from app.core.database.models import FunctionsDict, RoleFunctions, RolesDict, UserRoles
 
 
-def _check_permissions(
-    user_id: int = Depends(validate_user),
-    session: Session = Depends(get_db_connection),
-):
-    return check_permissions(user_id, Scope.roles, session)
+def _check_permissions(principal: Principal = Depends(get_principal)):
+    return check_permissions(principal, Scope.roles)
 
 
 router = APIRouter(
@@ -43,6 +45,7 @@ def assign_role_to_user(role: UserRoles, session: Session = Depends(get_db_conne
         logger.error(e)
         session.rollback()
         raise HTTPException(status_code=500, detail="Internal Server Error")
+    permission_cache.invalidate_user(role.user_id)
     return JSONResponse(
         status_code=201,
         content={"id": f"{role.id}"},
@@ -76,12 +79,16 @@ def remove_user_role_to_function(
     ).first()
     session.delete(role_function)
     session.commit()
+    permission_cache.invalidate_role(role_id)
     return Response(status_code=204)
 
 
 @router.patch(
     "/{role_id}",
-    description="Назначить роли пользователя (Admin) права на функцю (manage_users - управление пользователей)",
+    description=(
+        "Назначить роли пользователя (Admin) права на функцю "
+        "(manage_users - управление пользователей)"
+    ),
 )
 def assign_user_role_to_function(
     role_id: int,
@@ -111,6 +118,7 @@ def assign_user_role_to_function(
     session.add(role_function)
     session.commit()
     session.refresh(role_function)
+    permission_cache.invalidate_role(role_id)
     return JSONResponse(
         status_code=201,
         content={"id": f"{role_function.id}"},
@@ -128,12 +136,22 @@ def list_my_roles(
 
 
 @router.get("/")
-def list_roles(session: Session = Depends(get_db_connection)) -> list[RolesDict]:
-    return session.exec(select(RolesDict)).fetchall()
+def list_roles(
+    request: Request,
+    page: KeysetPage = Depends(),
+    session: Session = Depends(get_db_connection),
+) -> list[RolesDict]:
+    table = reference_cache.get(RolesDict) or reference_cache.load(session, RolesDict)
+    return reference_response(request, page, table, RolesDict.id)
 
 
 @router.get("/functions")
 def list_functions(
+    request: Request,
+    page: KeysetPage = Depends(),
     session: Session = Depends(get_db_connection),
 ) -> list[FunctionsDict]:
-    return session.exec(select(FunctionsDict)).fetchall()
+    table = reference_cache.get(FunctionsDict) or reference_cache.load(
+        session, FunctionsDict
+    )
+    return reference_response(request, page, table, FunctionsDict.id)
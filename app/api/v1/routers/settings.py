@@ -1,24 +1,30 @@
+import datetime
 import logging
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import JSONResponse, Response
 from sqlmodel import select
 
 from app.api.dependencies import (
+    FieldSet,
+    KeysetPage,
+    Projection,
     Scope,
     Session,
     check_permissions,
     get_db_connection,
-    validate_user,
+    get_principal,
+    reference_cache,
+    reference_response,
+    settings_resolver,
 )
+from app.api.models.users import Principal
+from app.api.responses import FastJSONResponse
 from app.core.database.models import Settings, SettingsDict
 
 
-def _check_permissions(
-    user_id: int = Depends(validate_user),
-    session: Session = Depends(get_db_connection),
-):
-    return check_permissions(user_id, Scope.settings, session)
+def _check_permissions(principal: Principal = Depends(get_principal)):
+    return check_permissions(principal, Scope.settings)
 
 
 router = APIRouter(
@@ -27,6 +33,8 @@ router = APIRouter(
     dependencies=[Depends(_check_permissions)],
 )
 
+setting_fields = FieldSet(Settings)
+
 logger = logging.getLogger("app.api.v1.routers.settings")
 
 
@@ -41,6 +49,7 @@ def add_setting(setting: Settings, session: Session = Depends(get_db_connection)
         logger.error(e)
         session.rollback()
         raise HTTPException(status_code=500, detail="Internal Server Error")
+    settings_resolver.invalidate()
     return JSONResponse(
         status_code=201,
         content={"id": f"{setting.id}"},
@@ -70,6 +79,7 @@ def update_setting(setting: Settings, session: Session = Depends(get_db_connecti
         logger.error(e)
         session.rollback()
         raise HTTPException(status_code=500, detail="Internal Server Error")
+    settings_resolver.invalidate()
     return JSONResponse(
         status_code=202,
         content={"id": f"{setting_exist.id}"},
@@ -78,28 +88,68 @@ def update_setting(setting: Settings, session: Session = Depends(get_db_connecti
 
 @router.get("/dict")
 def list_settings_dict(
+    request: Request,
+    page: KeysetPage = Depends(),
     session: Session = Depends(get_db_connection),
 ) -> list[SettingsDict]:
-    return session.exec(select(SettingsDict)).fetchall()
+    table = reference_cache.get(SettingsDict) or reference_cache.load(
+        session, SettingsDict
+    )
+    return reference_response(request, page, table, SettingsDict.id)
 
 
 @router.get("/")
 def list_settings(
+    page: KeysetPage = Depends(),
+    projection: Projection = Depends(setting_fields),
+    session: Session = Depends(get_db_connection),
+) -> list[dict]:
+    statement = page.apply(projection.select(), Settings.id)
+    settings = session.exec(statement).fetchall()
+    return FastJSONResponse(
+        projection.rows(page.finish(settings, Settings.id)),
+        headers=page.response.headers,
+    )
+
+
+@router.get("/effective")
+def get_effective_settings(
+    code: str | None = None,
+    at: datetime.date | None = None,
     session: Session = Depends(get_db_connection),
-) -> list[Settings]:
-    return session.exec(select(Settings)).fetchall()
+) -> dict:
+    """Values in effect on `at` (today by default) and the day the next one changes"""
+    # Declared before /{settings_id}, which would otherwise match "effective"
+    if settings_resolver.stale:
+        settings_resolver.load(session)
+    day = at or datetime.date.today()
+    values = settings_resolver.today() if at is None else settings_resolver.values(day)
+    if code is not None:
+        if code not in settings_resolver.codes:
+            raise HTTPException(status_code=404, detail=f"Setting {code} not found")
+        values = {code: values[code]} if code in values else {}
+    return FastJSONResponse(
+        {
+            "at": day,
+            "values": values,
+            "next_change": settings_resolver.next_change(day),
+        }
+    )
 
 
 @router.get("/{settings_id}")
 def get_settings(
-    settings_id: int, session: Session = Depends(get_db_connection)
-) -> Settings:
-    settings = session.exec(select(Settings).where(Settings.id == settings_id)).first()
+    settings_id: int,
+    projection: Projection = Depends(setting_fields),
+    session: Session = Depends(get_db_connection),
+) -> dict:
+    statement = projection.select().where(Settings.id == settings_id)
+    settings = session.exec(statement).first()
     if not settings:
         raise HTTPException(
             status_code=404, detail=f"Settings with id: {settings_id} not found"
         )
-    return settings
+    return FastJSONResponse(projection.row(settings))
 
 
 @router.delete("/{setting_id}")
@@ -118,4 +168,5 @@ def delete_settings(
         )
     session.delete(setting_exist)
     session.commit()
+    settings_resolver.invalidate()
     return Response(status_code=204)
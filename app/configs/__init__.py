@@ -1,2 +1,17 @@
 from .log_settings import LogConfig, get_logger
-from .settings import get_appsettings, get_database_settings
+from .settings import (
+    get_acl_settings,
+    get_appsettings,
+    get_database_settings,
+    get_export_settings,
+    get_hashing_settings,
+    get_import_settings,
+    get_metrics_settings,
+    get_page_settings,
+    get_profiler_settings,
+    get_query_budget_settings,
+    get_reference_settings,
+    get_search_settings,
+    get_slow_query_settings,
+    get_timing_settings,
+)
@@ -3,6 +3,7 @@ import logging.config
 import logging.handlers
 import queue
 import re
+from contextvars import ContextVar
 
 """
 Description: Log settings
@@ -73,6 +74,9 @@ class JSONFormatter(logging.Formatter):
         if record.stack_info:
             ready_message["stack"] = self.formatStack(record.stack_info)
 
+        # Structured data: logger.warning(msg, extra={"fields": {...}})
+        ready_message.update(values.get("fields") or {})
+
         for value_name in self._pattern.findall(self._fmt):
             value = values.get(value_name)
             ready_message.update({value_name: value})
@@ -97,6 +101,21 @@ class RouterFilter(logging.Filter):
         )
 
 
+# Fields of the request being served (request id, phase timings), set by
+# app.core.timing.TimingMiddleware
+log_context: ContextVar[dict | None] = ContextVar("log_context", default=None)
+
+
+class ContextFilter(logging.Filter):
+    # On the queue handler: it runs in the thread and context that logs,
+    # before the record is handed over to the listener thread
+    def filter(self, record) -> bool:
+        context = log_context.get()
+        if context is not None:
+            record.fields = {**context, **(getattr(record, "fields", None) or {})}
+        return True
+
+
 class AutoStartQueueListener(logging.handlers.QueueListener):
     def __init__(self, queue, *handlers, respect_handler_level=False):
         super().__init__(queue, *handlers, respect_handler_level=respect_handler_level)
@@ -124,6 +143,9 @@ LogConfig = {
         "router": {
             "()": RouterFilter,
         },
+        "context": {
+            "()": ContextFilter,
+        },
     },
     "handlers": {
         "rotate": {
@@ -157,6 +179,7 @@ LogConfig = {
                 "maxsize": -1,
             },
             "level": "DEBUG",
+            "filters": ["context"],
             "listener": AutoStartQueueListener,
             "handlers": ["json"],
             # 'handlers': ['cfg://handlers.json', 'cfg://handlers.console'],
@@ -1,3 +1,7 @@
+import tempfile
+from pathlib import Path
+from typing import Literal
+
 from dotenv import load_dotenv
 from pydantic import computed_field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -28,17 +32,165 @@ class DataBaseSettings(BaseSettings):
     dbname: str
     password: str
     engine: str = "psycopg"
+    # async_mode=True serves /api/v1 with async def routers on an AsyncEngine
+    async_mode: bool = False
+
+    pool_size: int = 20
+    max_overflow: int = 20
+    pool_timeout: float = 30.0
+    pool_recycle: int = 1800
+    pool_pre_ping: bool = True
+    pool_use_lifo: bool = False
+
+    # JSON list, e.g. PG_REPLICA_DSNS='["postgresql+psycopg://u:p@replica/db"]'
+    replica_dsns: list[str] = []
+    replica_strategy: Literal["round_robin", "least_connections"] = "round_robin"
+    # Reads go to the primary for this long after a client's successful write
+    replica_sticky_seconds: int = 5
 
     @computed_field(return_type=str)
     def pg_dsn(self) -> str:
         return f"postgresql+{self.engine}://{self.user}:{self.password}@{self.host}:{self.port}/{self.dbname}"
 
+    def pool_options(self) -> dict:
+        return {
+            "pool_size": self.pool_size,
+            "max_overflow": self.max_overflow,
+            "pool_timeout": self.pool_timeout,
+            "pool_recycle": self.pool_recycle,
+            "pool_pre_ping": self.pool_pre_ping,
+            "pool_use_lifo": self.pool_use_lifo,
+        }
+
 
 class JwtSettings(BaseSettings):
     model_config = SettingsConfigDict(env_prefix="JWT_")
 
     secret_key: str
     algorithm: str = "HS256"
+    cache_size: int = 10_000
+    # Seconds a verified token stays cached, well below the token lifetime
+    cache_ttl: int = 300
+
+
+class AclSettings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="ACL_")
+
+    cache_size: int = 10_000
+    cache_ttl: float = 60.0
+
+
+class HashingSettings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="HASH_")
+
+    executor: Literal["thread", "process"] = "thread"
+    workers: int = 4
+    # Jobs allowed to wait for a free worker; everything beyond is rejected with 503
+    max_queue: int = 32
+    # Separate process pool for bulk imports, so they never queue up logins
+    bulk_workers: int = 4
+    bulk_chunk_size: int = 64
+
+
+class PageSettings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="PAGE_")
+
+    default_limit: int = 100
+    # Larger limits are silently capped
+    max_limit: int = 1000
+    # Rows fetched from the server-side cursor per batch in streaming mode
+    stream_batch_size: int = 1000
+
+
+class SearchSettings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="SEARCH_")
+
+    default_limit: int = 10
+    max_limit: int = 50
+    # Per query, a slow keystroke fails fast instead of piling up
+    timeout_ms: int = 300
+    similarity_threshold: float = 0.3
+
+
+class ImportSettings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="IMPORT_")
+
+    max_rows: int = 100_000
+    max_bytes: int = 64 * 1024 * 1024
+
+
+class ExportSettings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="EXPORT_")
+
+    # Rows are sent in chunks of about this many bytes
+    chunk_size: int = 64 * 1024
+    gzip_level: int = 6
+
+
+class ReferenceSettings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="REFERENCE_")
+
+    # *_dict tables are reloaded from the database after this many seconds
+    ttl: float = 300.0
+    # Cache-Control for clients and, if public, shared proxies
+    max_age: int = 60
+    public: bool = True
+
+
+class MetricsSettings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="METRICS_")
+
+    # Prometheus /metrics, request latency middleware and SQL statement events
+    enabled: bool = True
+
+
+class QueryBudgetSettings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="QUERY_BUDGET_")
+
+    # warn logs requests over budget, strict fails them on the statement
+    # that goes over; off drops the per-request accounting
+    mode: Literal["off", "warn", "strict"] = "warn"
+    # SQL statements per request, unless the route has its own budget
+    default: int = 20
+    # JSON, e.g. QUERY_BUDGET_ROUTES='{"GET /api/v1/users/{user_id}": 3}'
+    routes: dict[str, int] = {}
+    # The same statement this many times in one request is reported as N+1
+    repeat_threshold: int = 5
+
+
+class SlowQuerySettings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="SLOW_QUERY_")
+
+    # Statements slower than this many seconds are logged (0 - off)
+    threshold: float = 0.5
+    # Share of slow SELECTs re-run with EXPLAIN (ANALYZE, BUFFERS)
+    explain_sample: float = 0.1
+    explain_timeout: float = 30.0
+    # EXPLAINs waiting for the worker, the rest are skipped
+    explain_queue: int = 10
+    # Latest plans kept for /api/v1/admin/slow-queries
+    plans: int = 50
+
+
+class TimingSettings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="TIMING_")
+
+    # Server-Timing response header with the phases of the request;
+    # X-Request-ID and the access log breakdown are always on
+    server_timing: bool = True
+
+
+class ProfilerSettings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="PROFILER_")
+
+    # Any value but 0 profiles the request if the bearer token grants manage_all
+    header: str = "X-Profile"
+    # Share of requests profiled per route, JSON, e.g.
+    # PROFILER_ROUTES='{"GET /api/v1/companies/": 0.01}'
+    routes: dict[str, float] = {}
+    # pstats files, only the latest `keep` are kept
+    directory: Path = Path(tempfile.gettempdir()) / "profiles"
+    keep: int = 50
 
 
 _app_settings = AppSettings()
@@ -57,3 +209,87 @@ _database_settings = DataBaseSettings()
 
 def get_database_settings() -> DataBaseSettings:
     return _database_settings
+
+
+_hashing_settings = HashingSettings()
+
+
+def get_hashing_settings() -> HashingSettings:
+    return _hashing_settings
+
+
+_acl_settings = AclSettings()
+
+
+def get_acl_settings() -> AclSettings:
+    return _acl_settings
+
+
+_page_settings = PageSettings()
+
+
+def get_page_settings() -> PageSettings:
+    return _page_settings
+
+
+_search_settings = SearchSettings()
+
+
+def get_search_settings() -> SearchSettings:
+    return _search_settings
+
+
+_import_settings = ImportSettings()
+
+
+def get_import_settings() -> ImportSettings:
+    return _import_settings
+
+
+_export_settings = ExportSettings()
+
+
+def get_export_settings() -> ExportSettings:
+    return _export_settings
+
+
+_reference_settings = ReferenceSettings()
+
+
+def get_reference_settings() -> ReferenceSettings:
+    return _reference_settings
+
+
+_metrics_settings = MetricsSettings()
+
+
+def get_metrics_settings() -> MetricsSettings:
+    return _metrics_settings
+
+
+_query_budget_settings = QueryBudgetSettings()
+
+
+def get_query_budget_settings() -> QueryBudgetSettings:
+    return _query_budget_settings
+
+
+_slow_query_settings = SlowQuerySettings()
+
+
+def get_slow_query_settings() -> SlowQuerySettings:
+    return _slow_query_settings
+
+
+_timing_settings = TimingSettings()
+
+
+def get_timing_settings() -> TimingSettings:
+    return _timing_settings
+
+
+_profiler_settings = ProfilerSettings()
+
+
+def get_profiler_settings() -> ProfilerSettings:
+    return _profiler_settings
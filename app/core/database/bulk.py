@@ -0,0 +1,186 @@
+from collections import defaultdict
+from collections.abc import AsyncIterator, Iterable, Iterator, Sequence
+from typing import Literal
+
+from psycopg import AsyncConnection, Connection
+from pydantic import BaseModel
+from sqlalchemy.dialects import postgresql
+from sqlmodel import Session, SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+USER_COLUMNS = (
+    "company_id",
+    "group_id",
+    "timezone_id",
+    "username",
+    "firtsname",
+    "lastname",
+    "patronymic",
+    "created_date",
+    "user_lock",
+    "comment",
+    "password",
+)
+
+# Dropped with the transaction, so a pooled connection never keeps it
+USER_STAGING_DDL = """
+CREATE TEMP TABLE user_import (
+    line integer PRIMARY KEY,
+    company_id bigint NOT NULL,
+    group_id bigint NOT NULL,
+    timezone_id smallint NOT NULL,
+    username varchar(60) NOT NULL,
+    firtsname varchar(60) NOT NULL,
+    lastname varchar(60) NOT NULL,
+    patronymic varchar(60),
+    created_date date NOT NULL,
+    user_lock boolean NOT NULL,
+    comment varchar(1000),
+    password varchar(255)
+) ON COMMIT DROP
+"""
+
+USER_COPY = f"COPY user_import (line, {', '.join(USER_COLUMNS)}) FROM STDIN"
+
+# Everything the constraints of users would reject, reported per line
+USER_CHECKS = """
+SELECT s.line, 'company_id: company not found' FROM user_import s
+WHERE NOT EXISTS (SELECT 1 FROM companies c WHERE c.id = s.company_id)
+UNION ALL
+SELECT s.line, 'group_id: group not found in the company' FROM user_import s
+WHERE NOT EXISTS (
+    SELECT 1 FROM user_groups g
+    WHERE g.id = s.group_id AND g.company_id = s.company_id
+)
+UNION ALL
+SELECT s.line, 'timezone_id: timezone not found' FROM user_import s
+WHERE NOT EXISTS (SELECT 1 FROM timezone_dict t WHERE t.id = s.timezone_id)
+UNION ALL
+SELECT s.line, 'username: already exists' FROM user_import s
+WHERE EXISTS (SELECT 1 FROM users u WHERE u.username = s.username)
+UNION ALL
+SELECT d.line, 'username: duplicated in the file' FROM (
+    SELECT line, row_number() OVER (PARTITION BY username ORDER BY line) AS n
+    FROM user_import
+) d WHERE d.n > 1
+ORDER BY 1
+"""
+
+USER_MERGE = f"""
+INSERT INTO users ({", ".join(USER_COLUMNS)})
+SELECT {", ".join(USER_COLUMNS)} FROM user_import
+WHERE line <> ALL(%(skip)s)
+ORDER BY line
+"""
+
+
+def _user_records(
+    rows: Sequence[tuple[int, BaseModel]], hashes: Sequence[str] | None
+) -> Iterable[tuple]:
+    for i, (line, user) in enumerate(rows):
+        yield (
+            line,
+            *(getattr(user, column) for column in USER_COLUMNS[:-1]),
+            hashes[i] if hashes is not None else None,
+        )
+
+
+def _errors(rows: Sequence[tuple[int, str]]) -> dict[int, list[str]]:
+    errors = defaultdict(list)
+    for line, message in rows:
+        errors[line].append(message)
+    return dict(errors)
+
+
+def _driver(session: Session) -> Connection:
+    return session.connection().connection.driver_connection
+
+
+async def _adriver(session: AsyncSession) -> AsyncConnection:
+    connection = await session.connection()
+    raw = await connection.get_raw_connection()
+    return raw.driver_connection
+
+
+def stage_users(
+    session: Session,
+    rows: Sequence[tuple[int, BaseModel]],
+    hashes: Sequence[str] | None = None,
+) -> dict[int, list[str]]:
+    """
+    Loads the rows into a temporary user_import table with COPY and returns
+    the errors of each failing line. The table lives until the session's
+    transaction ends; `merge_users` moves it into users.
+    """
+    with _driver(session).cursor() as cursor:
+        cursor.execute(USER_STAGING_DDL)
+        with cursor.copy(USER_COPY) as copy:
+            for record in _user_records(rows, hashes):
+                copy.write_row(record)
+        # Temp tables are never auto-analyzed, the checks need row estimates
+        cursor.execute("ANALYZE user_import")
+        cursor.execute(USER_CHECKS)
+        return _errors(cursor.fetchall())
+
+
+def merge_users(session: Session, skip: Iterable[int] = ()) -> int:
+    with _driver(session).cursor() as cursor:
+        cursor.execute(USER_MERGE, {"skip": list(skip)})
+        return cursor.rowcount
+
+
+async def astage_users(
+    session: AsyncSession,
+    rows: Sequence[tuple[int, BaseModel]],
+    hashes: Sequence[str] | None = None,
+) -> dict[int, list[str]]:
+    async with (await _adriver(session)).cursor() as cursor:
+        await cursor.execute(USER_STAGING_DDL)
+        async with cursor.copy(USER_COPY) as copy:
+            for record in _user_records(rows, hashes):
+                await copy.write_row(record)
+        await cursor.execute("ANALYZE user_import")
+        await cursor.execute(USER_CHECKS)
+        return _errors(await cursor.fetchall())
+
+
+async def amerge_users(session: AsyncSession, skip: Iterable[int] = ()) -> int:
+    async with (await _adriver(session)).cursor() as cursor:
+        await cursor.execute(USER_MERGE, {"skip": list(skip)})
+        return cursor.rowcount
+
+
+def export_sql(
+    model: type[SQLModel],
+    format: Literal["csv", "ndjson"],
+    exclude: Iterable[str] = (),
+) -> str:
+    """
+    COPY ... TO STDOUT of the whole table in primary key order. NDJSON rows
+    are built by row_to_json and written as one CSV column whose quote and
+    delimiter can't occur in JSON, so Postgres writes them unescaped.
+    """
+    table = model.__table__
+    columns = [column for column in table.columns if column.name not in exclude]
+    query = select(*columns).order_by(*table.primary_key.columns)
+    query = str(query.compile(dialect=postgresql.dialect()))
+    if format == "csv":
+        return f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER)"
+    return (
+        f"COPY (SELECT row_to_json(t) FROM ({query}) t) TO STDOUT "
+        "WITH (FORMAT csv, QUOTE E'\\x01', DELIMITER E'\\x02')"
+    )
+
+
+def copy_out(session: Session, sql: str) -> Iterator[bytes]:
+    # Rows come as libpq hands them over, nothing is buffered here
+    with _driver(session).cursor() as cursor, cursor.copy(sql) as copy:
+        for data in copy:
+            yield bytes(data)
+
+
+async def acopy_out(session: AsyncSession, sql: str) -> AsyncIterator[bytes]:
+    async with (await _adriver(session)).cursor() as cursor:
+        async with cursor.copy(sql) as copy:
+            async for data in copy:
+                yield bytes(data)
@@ -0,0 +1,150 @@
+import threading
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlmodel import create_engine
+
+from app.configs.settings import (
+    DataBaseSettings,
+    get_metrics_settings,
+    get_query_budget_settings,
+    get_slow_query_settings,
+    get_timing_settings,
+)
+from app.core.metrics import track_statements
+
+
+class PoolMetrics:
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.connects = 0
+        self.connect_seconds_total = 0.0
+        self.connect_seconds_max = 0.0
+        self._lock = threading.Lock()
+
+    def observe_wait(self, seconds: float, timeout: bool = False):
+        with self._lock:
+            self.checkouts += 1
+            self.timeouts += timeout
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def observe_connect(self, seconds: float):
+        with self._lock:
+            self.connects += 1
+            self.connect_seconds_total += seconds
+            self.connect_seconds_max = max(self.connect_seconds_max, seconds)
+
+    def snapshot(self, pool: QueuePool) -> dict:
+        return {
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(0, pool.overflow()),
+            "max_overflow": pool._max_overflow,
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_avg_seconds": (
+                self.wait_seconds_total / self.checkouts if self.checkouts else 0.0
+            ),
+            "wait_max_seconds": self.wait_seconds_max,
+            "connects": self.connects,
+            "connect_avg_seconds": (
+                self.connect_seconds_total / self.connects if self.connects else 0.0
+            ),
+            "connect_max_seconds": self.connect_seconds_max,
+        }
+
+
+# Pools are recreated on dispose(), so metrics are kept by pool logging name
+_pool_metrics: dict[str, PoolMetrics] = {}
+
+
+def get_pool_metrics(name: str) -> PoolMetrics:
+    return _pool_metrics.setdefault(name, PoolMetrics())
+
+
+class _WaitTimingPool:
+    # SQLAlchemy has no "before checkout" event, so the time spent waiting
+    # for a free (or new overflow) connection is measured around _do_get
+    def _do_get(self):
+        metrics = get_pool_metrics(self._orig_logging_name)
+        started = time.perf_counter()
+        try:
+            entry = super()._do_get()
+        except exc.TimeoutError:
+            metrics.observe_wait(time.perf_counter() - started, timeout=True)
+            raise
+        metrics.observe_wait(time.perf_counter() - started)
+        return entry
+
+
+class InstrumentedQueuePool(_WaitTimingPool, QueuePool):
+    pass
+
+
+class InstrumentedAsyncAdaptedQueuePool(_WaitTimingPool, AsyncAdaptedQueuePool):
+    pass
+
+
+def _instrument(engine: Engine, name: str):
+    metrics = get_pool_metrics(name)
+
+    # Kept on the connection record: async connects all run on the event loop
+    # thread and overlap, so neither a thread local nor a field would do
+    @event.listens_for(engine, "do_connect")
+    def _connect_started(dialect, conn_rec, cargs, cparams):
+        conn_rec.info["connect_started"] = time.perf_counter()
+
+    @event.listens_for(engine, "connect")
+    def _connect_finished(dbapi_connection, connection_record):
+        started = connection_record.info.pop("connect_started", None)
+        if started is not None:
+            metrics.observe_connect(time.perf_counter() - started)
+
+    # Feeds /metrics, the query budget, the slow query log and the db phase
+    # of Server-Timing; with all four off no statement is timed
+    if (
+        get_metrics_settings().enabled
+        or get_query_budget_settings().mode != "off"
+        or get_slow_query_settings().threshold > 0
+        or get_timing_settings().server_timing
+    ):
+        track_statements(engine)
+
+
+def create_db_engine(
+    settings: DataBaseSettings, name: str = "primary", dsn: str | None = None
+) -> Engine:
+    engine = create_engine(
+        dsn or settings.pg_dsn,
+        poolclass=InstrumentedQueuePool,
+        pool_logging_name=name,
+        **settings.pool_options(),
+    )
+    _instrument(engine, name)
+    return engine
+
+
+def create_async_db_engine(
+    settings: DataBaseSettings, name: str = "primary_async", dsn: str | None = None
+) -> AsyncEngine:
+    engine = create_async_engine(
+        dsn or settings.pg_dsn,
+        poolclass=InstrumentedAsyncAdaptedQueuePool,
+        pool_logging_name=name,
+        **settings.pool_options(),
+    )
+    _instrument(engine.sync_engine, name)
+    return engine
+
+
+def pool_status(engine: Engine | AsyncEngine, name: str) -> dict:
+    # name is the one the engine was created with
+    return get_pool_metrics(name).snapshot(engine.pool)
@@ -163,8 +163,10 @@ class Companies(SQLModel, table=True):
         ForeignKeyConstraint(["property_id"], ["property_code_dict.id"], name="companies_property_id_fkey"),
         PrimaryKeyConstraint("id", name="pk_companies"),
         Index("idx_companies_bic", "bic"),
+        Index("idx_companies_created_date_id", "created_date", "id"),
         Index("idx_companies_inn", "inn"),
         Index("idx_companies_kpp", "kpp"),
+        Index("idx_companies_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
         Index("idx_companies_ogrn", "ogrn"),
         Index("idx_companies_property_id", "property_id"),
         {"comment": "Таблица с компаниями"}
@@ -339,12 +341,16 @@ class Users(SQLModel, table=True):
         PrimaryKeyConstraint("id", name="pk_users"),
         Index("idx_users_company_id", "company_id"),
         Index("idx_users_company_id_group_id", "company_id", "group_id"),
+        Index("idx_users_created_date_id", "created_date", "id"),
+        Index("idx_users_firtsname_trgm", "firtsname", postgresql_using="gin", postgresql_ops={"firtsname": "gin_trgm_ops"}),
+        Index("idx_users_lastname_trgm", "lastname", postgresql_using="gin", postgresql_ops={"lastname": "gin_trgm_ops"}),
         Index("idx_users_group_id", "group_id"),
         Index("idx_users_id_company_id", "id", "company_id"),
         Index("idx_users_id_group_id", "id", "group_id"),
         Index("idx_users_id_property_id", "id"),
         Index("idx_users_timezone_id", "timezone_id"),
         Index("idx_users_username", "username"),
+        Index("idx_users_username_trgm", "username", postgresql_using="gin", postgresql_ops={"username": "gin_trgm_ops"}),
         Index("idx_users_username_user_lock", "username", "user_lock"),
         {"comment": "Таблица пользователей"}
     )
@@ -0,0 +1,84 @@
+import itertools
+from typing import Literal
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.sql.dml import UpdateBase
+from sqlmodel import Session
+from starlette.requests import Request
+
+READ_METHODS = frozenset({"GET", "HEAD"})
+# Sent by clients that must see their own writes, e.g. right after a POST
+READ_PRIMARY_HEADER = "X-Read-Primary"
+# Set on responses to successful mutations for PG_REPLICA_STICKY_SECONDS
+READ_PRIMARY_COOKIE = "read_primary"
+
+
+class ReplicaSet:
+    def __init__(
+        self,
+        engines: list[Engine] | list[AsyncEngine],
+        strategy: Literal["round_robin", "least_connections"] = "round_robin",
+    ):
+        self.engines = engines
+        self.strategy = strategy
+        self._counter = itertools.count()
+
+    def __bool__(self) -> bool:
+        return bool(self.engines)
+
+    def choose(self) -> Engine:
+        if self.strategy == "least_connections":
+            engine = min(self.engines, key=lambda e: e.pool.checkedout())
+        else:
+            engine = self.engines[next(self._counter) % len(self.engines)]
+        return engine.sync_engine if isinstance(engine, AsyncEngine) else engine
+
+
+class RoutingSession(Session):
+    """
+    Sends reads to the replica picked for the request and everything else to
+    the primary. Once the session has written, later reads stay on the
+    primary as well, so a handler always sees its own changes.
+    """
+
+    def __init__(self, bind: Engine, *, replica: Engine | None = None, **kw):
+        super().__init__(bind=bind, **kw)
+        self.primary = bind
+        self.replica = replica
+
+    @property
+    def on_primary(self) -> bool:
+        return self.replica is None
+
+    def stick_to_primary(self):
+        self.replica = None
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self.replica is None:
+            return self.primary
+        if self._flushing or isinstance(clause, UpdateBase):
+            self.stick_to_primary()
+            return self.primary
+        # One statement only, e.g. a read whose result is cached
+        if clause is not None and clause.get_execution_options().get("read_primary"):
+            return self.primary
+        return self.replica
+
+
+def read_primary(session: Session | AsyncSession):
+    """
+    Sends the remaining reads of the session to the primary. For data kept
+    past the request, a lagging replica's rows would outlive the lag.
+    """
+    session = getattr(session, "sync_session", session)
+    if isinstance(session, RoutingSession):
+        session.stick_to_primary()
+
+
+def reads_from_replica(request: Request) -> bool:
+    if request.method not in READ_METHODS:
+        return False
+    if request.headers.get(READ_PRIMARY_HEADER, "").lower() in ("1", "true", "yes"):
+        return False
+    return READ_PRIMARY_COOKIE not in request.cookies
@@ -0,0 +1,40 @@
+from psycopg.errors import QueryCanceled
+from sqlalchemy import ColumnElement, func, or_, select
+from sqlalchemy.exc import DBAPIError
+
+from app.configs.settings import SearchSettings
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("!", "!!").replace("%", "!%").replace("_", "!_")
+
+
+def trigram_match(
+    columns: list[ColumnElement], query: str
+) -> tuple[ColumnElement, ColumnElement]:
+    """
+    Condition and rank of a typeahead search. Both `%` (similarity) and
+    ILIKE 'query%' are served by a gin_trgm_ops index on each column, so the
+    condition is a bitmap OR of index scans.
+    """
+    prefix = _escape_like(query) + "%"
+    condition = or_(
+        *(column.op("%")(query) for column in columns),
+        *(column.ilike(prefix, escape="!") for column in columns),
+    )
+    score = func.greatest(*(func.similarity(column, query) for column in columns))
+    return condition, score
+
+
+def search_limits(settings: SearchSettings):
+    # Transaction local, so the pooled connection gets its defaults back
+    return select(
+        func.set_config("statement_timeout", f"{settings.timeout_ms}ms", True),
+        func.set_config(
+            "pg_trgm.similarity_threshold", str(settings.similarity_threshold), True
+        ),
+    )
+
+
+def is_timeout(e: DBAPIError) -> bool:
+    return isinstance(e.orig, QueryCanceled)
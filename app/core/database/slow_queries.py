@@ -0,0 +1,153 @@
+"""
+Statements slower than SLOW_QUERY_THRESHOLD are logged with normalized SQL
+and parameter types, never values. A sampled share of the slow SELECTs is
+re-run as EXPLAIN (ANALYZE, BUFFERS) in a background thread on a connection
+of its own, and the latest plans are kept in memory.
+"""
+
+import datetime
+import logging
+import random
+import re
+import threading
+from collections import deque
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import URL, create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import NullPool
+
+from app.configs.settings import SlowQuerySettings, get_slow_query_settings
+
+logger = logging.getLogger("app.core.database.slow_queries")
+
+_SPACES = re.compile(r"\s+")
+_LITERALS = re.compile(r"'(?:[^']|'')*'|(?<![\w$])\d+(?:\.\d+)?\b")
+_PLACEHOLDER = r"\s*(?:%\(\w+\)s|%s|\?)\s*"
+_PLACEHOLDER_LISTS = re.compile(rf"\((?:{_PLACEHOLDER},)+{_PLACEHOLDER}\)")
+_READS = re.compile(r"^\s*(?:select|with)\b", re.IGNORECASE)
+
+
+def normalize(statement: str) -> str:
+    """One line, literals as ?, IN lists of any length as (...)"""
+    statement = _LITERALS.sub("?", _SPACES.sub(" ", statement).strip())
+    return _PLACEHOLDER_LISTS.sub("(...)", statement)
+
+
+def parameters_shape(parameters) -> object:
+    if isinstance(parameters, Mapping):
+        return {name: type(value).__name__ for name, value in parameters.items()}
+    if isinstance(parameters, list | tuple):
+        if parameters and isinstance(parameters[0], Mapping | list | tuple):
+            return {"rows": len(parameters), "row": parameters_shape(parameters[0])}
+        return [type(value).__name__ for value in parameters]
+    return None
+
+
+class SlowQueryLog:
+    def __init__(self, settings: SlowQuerySettings):
+        self.settings = settings
+        self.plans: deque[dict] = deque(maxlen=settings.plans)
+        self.slow = 0
+        self.explained = 0
+        self.dropped = 0
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="explain")
+        # NullPool engines, so EXPLAIN neither waits for nor holds a
+        # connection of the pools serving requests
+        self._engines: dict[URL, Engine] = {}
+
+    def observe(
+        self,
+        engine: Engine,
+        route: str,
+        statement: str,
+        parameters,
+        seconds: float,
+        executemany: bool,
+    ):
+        if not self.settings.threshold or seconds < self.settings.threshold:
+            return
+        record = {
+            "route": route,
+            "duration_ms": round(seconds * 1000, 3),
+            "statement": normalize(statement),
+            "parameters": parameters_shape(parameters),
+        }
+        with self._lock:
+            self.slow += 1
+        logger.warning(
+            f"Slow query on {route}: {record['duration_ms']} ms",
+            extra={"fields": record},
+        )
+        if (
+            engine.dialect.name == "postgresql"
+            and not executemany
+            and _READS.match(statement)
+            and random.random() < self.settings.explain_sample
+        ):
+            self._submit(engine.url, statement, parameters, record)
+
+    def _submit(self, url: URL, statement: str, parameters, record: dict):
+        with self._lock:
+            if self._pending >= self.settings.explain_queue:
+                self.dropped += 1
+                return
+            self._pending += 1
+        self._executor.submit(self._explain, url, statement, parameters, record)
+
+    def _engine(self, url: URL) -> Engine:
+        engine = self._engines.get(url)
+        if engine is None:
+            engine = self._engines[url] = create_engine(url, poolclass=NullPool)
+        return engine
+
+    def _explain(self, url: URL, statement: str, parameters, record: dict):
+        timeout = int(self.settings.explain_timeout * 1000)
+        try:
+            # ANALYZE runs the statement: a read only transaction that is
+            # rolled back keeps a SELECT calling a writing function harmless
+            with self._engine(url).connect() as conn:
+                conn.exec_driver_sql("SET TRANSACTION READ ONLY")
+                conn.exec_driver_sql(f"SET LOCAL statement_timeout = {timeout}")
+                plan = conn.exec_driver_sql(
+                    f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}",
+                    parameters or (),
+                ).scalar_one()
+                conn.rollback()
+        except Exception as e:
+            logger.error(f"EXPLAIN of a slow query failed: {e}")
+            return
+        finally:
+            with self._lock:
+                self._pending -= 1
+        explained = {
+            **record,
+            "explained_at": datetime.datetime.now(datetime.UTC).isoformat(),
+            "plan": plan,
+        }
+        with self._lock:
+            self.explained += 1
+            self.plans.appendleft(explained)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "threshold_seconds": self.settings.threshold,
+                "explain_sample": self.settings.explain_sample,
+                "slow": self.slow,
+                "explained": self.explained,
+                "dropped": self.dropped,
+                "pending": self._pending,
+                "plans": list(self.plans),
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        for engine in self._engines.values():
+            engine.dispose()
+
+
+slow_query_log = SlowQueryLog(get_slow_query_settings())
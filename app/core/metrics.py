@@ -0,0 +1,280 @@
+"""
+Prometheus text format metrics without the client library: request latency
+per route template, requests in flight and SQL statement latency per route.
+Pool and cache figures are taken from their own counters at scrape time.
+"""
+
+import bisect
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core import timing
+from app.core.database.slow_queries import slow_query_log
+from app.core.queries import query_budget
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UNMATCHED = "<unmatched>"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [
+        f'{name}="{_escape(str(value))}"'
+        for name, value in zip(names, values, strict=True)
+    ]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._series: dict[tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def header(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.type}"
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, labels: tuple = (), amount: float = 1):
+        with self._lock:
+            self._series[labels] = self._series.get(labels, 0) + amount
+
+    def render(self) -> Iterator[str]:
+        yield from self.header()
+        with self._lock:
+            series = list(self._series.items())
+        for labels, value in series:
+            yield f"{self.name}{_labels(self.labels, labels)} {value}"
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, labels: tuple = (), amount: float = 1):
+        self.inc(labels, -amount)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, help, labels)
+        self.buckets = buckets
+
+    def observe(self, labels: tuple, value: float):
+        # Counts are kept per bucket and accumulated only when rendered
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += value
+
+    def render(self) -> Iterator[str]:
+        yield from self.header()
+        with self._lock:
+            series = [
+                (labels, (list(counts), total))
+                for labels, (counts, total) in self._series.items()
+            ]
+        for labels, (counts, total) in series:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts, strict=True):
+                cumulative += count
+                bucket = _labels(self.labels, labels, f'le="{bound}"')
+                yield f"{self.name}_bucket{bucket} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labels, labels)} {total}"
+            yield f"{self.name}_count{_labels(self.labels, labels)} {cumulative}"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: list[_Metric] = []
+
+    def add(self, metric: _Metric) -> _Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def lines(self) -> Iterator[str]:
+        for metric in self.metrics:
+            yield from metric.render()
+
+
+registry = Registry()
+
+http_requests = registry.add(
+    Histogram(
+        "http_request_duration_seconds",
+        "Request latency by route template",
+        ("method", "route", "status"),
+    )
+)
+http_in_flight = registry.add(
+    Gauge("http_requests_in_flight", "Requests being processed")
+)
+db_statements = registry.add(
+    Histogram(
+        "db_statement_duration_seconds",
+        "SQL statement latency by the route that issued it",
+        ("route",),
+    )
+)
+
+POOL_GAUGES = ("size", "checked_in", "checked_out", "overflow")
+POOL_COUNTERS = ("checkouts", "timeouts", "connects")
+
+
+def _samples(
+    name: str, type: str, help: str, label: str, values: dict[str, float]
+) -> Iterator[str]:
+    yield f"# HELP {name} {help}"
+    yield f"# TYPE {name} {type}"
+    for key, value in values.items():
+        yield f'{name}{{{label}="{_escape(key)}"}} {value}'
+
+
+def render(pools: dict[str, dict], caches: dict[str, dict]) -> str:
+    """Registry metrics plus snapshots of /health/db pools and /health/caches"""
+    lines = list(registry.lines())
+    for field in POOL_GAUGES:
+        lines.extend(
+            _samples(
+                f"db_pool_{field}",
+                "gauge",
+                f"Pool connections: {field.replace('_', ' ')}",
+                "pool",
+                {pool: status[field] for pool, status in pools.items()},
+            )
+        )
+    for field in POOL_COUNTERS:
+        lines.extend(
+            _samples(
+                f"db_pool_{field}_total",
+                "counter",
+                f"Pool {field}",
+                "pool",
+                {pool: status[field] for pool, status in pools.items()},
+            )
+        )
+    for field in ("hits", "misses"):
+        lines.extend(
+            _samples(
+                f"cache_{field}_total",
+                "counter",
+                f"Cache {field}",
+                "cache",
+                {cache: stats[field] for cache, stats in caches.items()},
+            )
+        )
+    lines.extend(
+        _samples(
+            "cache_hit_ratio",
+            "gauge",
+            "Cache hits over all lookups",
+            "cache",
+            {cache: stats["hit_ratio"] for cache, stats in caches.items()},
+        )
+    )
+    return "\n".join(lines) + "\n"
+
+
+# Scope of the request being served. The router adds the matched route to
+# the same dict, so SQL events see the route template once routing is done
+_scope: ContextVar[Scope | None] = ContextVar("_scope", default=None)
+
+
+def route_of(scope: Scope | None) -> str:
+    route = scope.get("route") if scope is not None else None
+    return getattr(route, "path", UNMATCHED)
+
+
+class MetricsMiddleware:
+    """Pure ASGI, so streaming responses are timed until the last chunk"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        status = 500
+
+        async def send_status(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        token = _scope.set(scope)
+        http_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            http_requests.observe(
+                (scope["method"], route_of(scope), status),
+                time.perf_counter() - started,
+            )
+            http_in_flight.dec()
+            _scope.reset(token)
+
+
+def _timed(engine: Engine, execute: Callable, executemany: bool = False) -> Callable:
+    def _execute(cursor, statement, *args):
+        route = route_of(_scope.get())
+        started = time.perf_counter()
+        try:
+            execute(cursor, statement, *args)
+        finally:
+            seconds = time.perf_counter() - started
+            db_statements.observe((route,), seconds)
+            timing.add("db", seconds)
+        # args are (parameters, context), or (context,) for do_execute_no_params
+        parameters = args[0] if len(args) == 2 else None
+        query_budget.record(statement, seconds, parameters)
+        slow_query_log.observe(
+            engine, route, statement, parameters, seconds, executemany
+        )
+        # The statement is executed, the dialect must not run it again
+        return True
+
+    return _execute
+
+
+def track_statements(engine: Engine):
+    # Dialect level do_execute events wrap the cursor call itself.
+    # before/after_cursor_execute would give the same timing, but any
+    # Connection event makes every begin/commit/execute dispatch through
+    # the event system, which costs more than the timing does.
+    dialect = engine.dialect
+    event.listen(engine, "do_execute", _timed(engine, dialect.do_execute))
+    event.listen(engine, "do_executemany", _timed(engine, dialect.do_executemany, True))
+    event.listen(
+        engine, "do_execute_no_params", _timed(engine, dialect.do_execute_no_params)
+    )
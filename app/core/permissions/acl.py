@@ -1,3 +1,4 @@
+from collections.abc import Iterable
 from enum import StrEnum
 
 
@@ -7,6 +8,9 @@ class Scope(StrEnum):
     settings = "settings"
     groups = "groups"
     roles = "roles"
+    import_data = "import_data"
+    export_data = "export_data"
+    admin = "admin"
 
 
 # TODO: по хорошему нужно брать данные правила динамии из БД
@@ -56,4 +60,40 @@ ACL = {
         Functions.manage_all,
         Functions.manage_roles,
     },
+    Scope.import_data: {
+        Functions.manage_all,
+        Functions.import_data,
+    },
+    Scope.export_data: {
+        Functions.manage_all,
+        Functions.export_data,
+    },
+    Scope.admin: {
+        Functions.manage_all,
+    },
 }
+
+
+# Compiled ACL: every function owns a bit, every scope is a precomputed mask
+# and the permissions of a user collapse into one int.
+# Bits follow the declaration order of Functions and are carried in issued
+# JWTs, so new functions must only be appended to the enum.
+FUNCTION_BITS: dict[str, int] = {
+    function: 1 << bit for bit, function in enumerate(Functions)
+}
+
+
+def functions_mask(codes: Iterable[str]) -> int:
+    mask = 0
+    for code in codes:
+        mask |= FUNCTION_BITS.get(code, 0)
+    return mask
+
+
+ACL_MASKS: dict[Scope, int] = {
+    scope: functions_mask(functions) for scope, functions in ACL.items()
+}
+
+
+def has_access(mask: int, scope: Scope) -> bool:
+    return mask & ACL_MASKS[scope] != 0
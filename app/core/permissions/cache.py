@@ -0,0 +1,93 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+
+class _Entry(NamedTuple):
+    expires_at: float
+    roles: frozenset[int]
+    mask: int
+
+
+class PermissionCache:
+    """
+    Per-user LRU of compiled ACL masks, bounded by size and TTL.
+    Role ids are kept with every entry, so a change of role functions only
+    drops the users holding that role.
+    A mask is read from the database before it is put, so an invalidation
+    may land in between: `generation` taken before the read makes `put`
+    skip such a mask instead of caching it for a whole TTL.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._users: OrderedDict[int, _Entry] = OrderedDict()
+        # Bumped by invalidate_user, and for everyone by invalidate_role and
+        # clear: users not cached yet may be loading the role too
+        self._generations: dict[int, int] = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> int | None:
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is not None:
+                if entry.expires_at > time.monotonic():
+                    self._users.move_to_end(user_id)
+                    self.hits += 1
+                    return entry.mask
+                del self._users[user_id]
+            self.misses += 1
+            return None
+
+    def generation(self, user_id: int) -> tuple[int, int]:
+        with self._lock:
+            return self._epoch, self._generations.get(user_id, 0)
+
+    def put(
+        self,
+        user_id: int,
+        roles: frozenset[int],
+        mask: int,
+        generation: tuple[int, int] | None = None,
+    ):
+        with self._lock:
+            current = self._epoch, self._generations.get(user_id, 0)
+            if generation is not None and generation != current:
+                return
+            self._users[user_id] = _Entry(time.monotonic() + self.ttl, roles, mask)
+            self._users.move_to_end(user_id)
+            while len(self._users) > self.maxsize:
+                self._users.popitem(last=False)
+
+    def invalidate_user(self, user_id: int):
+        with self._lock:
+            self._users.pop(user_id, None)
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+
+    def invalidate_role(self, role_id: int):
+        with self._lock:
+            self._epoch += 1
+            for user_id, entry in list(self._users.items()):
+                if role_id in entry.roles:
+                    del self._users[user_id]
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            self._users.clear()
+
+    def metrics(self) -> dict:
+        requests = self.hits + self.misses
+        return {
+            "size": len(self._users),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / requests if requests else 0.0,
+        }
@@ -0,0 +1,147 @@
+"""
+cProfile of single requests: asked for by an admin with a header, or
+sampled on chosen routes. Profiles are pstats files in a directory that
+keeps only the latest PROFILER_KEEP of them.
+Since Python 3.12 cProfile hooks every thread through sys.monitoring, so a
+profile covers the threadpool running sync handlers too, and also whatever
+else the process did meanwhile. One profile is taken at a time.
+"""
+
+import cProfile
+import datetime
+import logging
+import random
+import re
+import threading
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.configs.settings import ProfilerSettings, get_profiler_settings
+from app.core import timing
+
+logger = logging.getLogger("app.core.profiler")
+
+PROFILE_ID_HEADER = "X-Profile-Id"
+_PROFILE_NAME = re.compile(r"[\w.\-]+\.prof")
+
+
+class ProfileStore:
+    def __init__(self, directory: Path, keep: int):
+        self.directory = directory
+        self.keep = keep
+
+    def _files(self) -> list[Path]:
+        if not self.directory.is_dir():
+            return []
+        files = self.directory.glob("*.prof")
+        return sorted(files, key=lambda path: path.stat().st_mtime, reverse=True)
+
+    def save(self, profile: cProfile.Profile, name: str) -> Path:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{name}.prof"
+        profile.dump_stats(path)
+        for old in self._files()[self.keep :]:
+            old.unlink(missing_ok=True)
+        return path
+
+    def list(self) -> list[dict]:
+        profiles = []
+        for path in self._files():
+            stat = path.stat()
+            profiles.append(
+                {
+                    "name": path.name,
+                    "size": stat.st_size,
+                    "created": datetime.datetime.fromtimestamp(
+                        stat.st_mtime, datetime.UTC
+                    ).isoformat(),
+                }
+            )
+        return profiles
+
+    def path(self, name: str) -> Path | None:
+        if not _PROFILE_NAME.fullmatch(name):
+            return None
+        path = self.directory / name
+        return path if path.is_file() else None
+
+
+class Profiler:
+    def __init__(self, settings: ProfilerSettings):
+        self.settings = settings
+        self.store = ProfileStore(settings.directory, settings.keep)
+        self._lock = threading.Lock()
+
+    def sampled(self, scope: Scope) -> bool:
+        if not self.settings.routes:
+            return False
+        # Runs before routing, so the route template is matched here
+        for route in scope["app"].router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                key = f"{scope['method']} {route.path}"
+                return random.random() < self.settings.routes.get(key, 0.0)
+        return False
+
+    def start(self) -> cProfile.Profile | None:
+        if not self._lock.acquire(blocking=False):
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as e:
+            # Another profiler (a debugger, py-spy in-process...) is active
+            self._lock.release()
+            logger.warning(f"Request profile skipped: {e}")
+            return None
+        return profile
+
+    def stop(self, profile: cProfile.Profile):
+        profile.disable()
+        self._lock.release()
+
+
+class ProfilerMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        profiler: Profiler,
+        is_admin: Callable[[Scope], Awaitable[bool]],
+    ):
+        self.app = app
+        self.profiler = profiler
+        self.is_admin = is_admin
+
+    async def _wanted(self, scope: Scope) -> bool:
+        requested = Headers(scope=scope).get(self.profiler.settings.header)
+        if requested and requested != "0" and await self.is_admin(scope):
+            return True
+        return self.profiler.sampled(scope)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not await self._wanted(scope):
+            return await self.app(scope, receive, send)
+        profile = self.profiler.start()
+        if profile is None:
+            return await self.app(scope, receive, send)
+        started = datetime.datetime.now(datetime.UTC).strftime("%Y%m%dT%H%M%S")
+        name = f"{started}-{timing.request_id()}"
+
+        async def send_profile_id(message: Message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append(PROFILE_ID_HEADER, f"{name}.prof")
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_profile_id)
+        finally:
+            self.profiler.stop(profile)
+            await run_in_threadpool(self.profiler.store.save, profile, name)
+
+
+profiler = Profiler(get_profiler_settings())
@@ -0,0 +1,182 @@
+"""
+Per-request SQL statement accounting: count, total time and the statements
+repeated within one request. An N+1 query shows up as the same statement
+text executed over and over with different parameters.
+"""
+
+import logging
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.configs.settings import QueryBudgetSettings, get_query_budget_settings
+
+logger = logging.getLogger("app.core.queries")
+
+
+class QueryBudgetExceeded(RuntimeError):
+    pass
+
+
+def route_key(scope: Scope) -> str:
+    route = scope.get("route")
+    return f"{scope['method']} {getattr(route, 'path', scope['path'])}"
+
+
+class RequestQueries:
+    __slots__ = ("count", "parameters", "scope", "seconds", "shapes", "varied")
+
+    def __init__(self, scope: Scope):
+        self.scope = scope
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes: dict[str, int] = {}
+        # First parameters of every statement, and the statements run again
+        # with other parameters
+        self.parameters: dict[str, object] = {}
+        self.varied: set[str] = set()
+
+    @property
+    def route(self) -> str:
+        return route_key(self.scope)
+
+    def record(self, statement: str, seconds: float, parameters=None) -> int:
+        self.count += 1
+        self.seconds += seconds
+        repeats = self.shapes[statement] = self.shapes.get(statement, 0) + 1
+        if repeats == 1:
+            self.parameters[statement] = parameters
+        elif statement not in self.varied and parameters != self.parameters[statement]:
+            self.varied.add(statement)
+        return repeats
+
+    def repeated(self, threshold: int) -> dict[str, int]:
+        return {
+            statement: count
+            for statement, count in self.shapes.items()
+            if count >= threshold
+        }
+
+    def report(self, repeat_threshold: int) -> dict:
+        repeated = self.repeated(repeat_threshold)
+        return {
+            "route": self.route,
+            "statements": self.count,
+            "db_seconds": round(self.seconds, 6),
+            # Same statement, same parameters: a result worth reusing
+            "repeated": {
+                statement: count
+                for statement, count in repeated.items()
+                if statement not in self.varied
+            },
+            # Same statement, other parameters: one query per row, N+1
+            "n_plus_one": {
+                statement: count
+                for statement, count in repeated.items()
+                if statement in self.varied
+            },
+        }
+
+
+_current: ContextVar[RequestQueries | None] = ContextVar("_current", default=None)
+# Called with every finished request, see assert_max_queries
+_observers: list[Callable[[RequestQueries], None]] = []
+
+
+class QueryBudget:
+    def __init__(self, settings: QueryBudgetSettings):
+        self.settings = settings
+
+    def limit(self, scope: Scope) -> int:
+        return self.settings.routes.get(route_key(scope), self.settings.default)
+
+    def record(self, statement: str, seconds: float, parameters=None):
+        queries = _current.get()
+        if queries is None:
+            return
+        repeats = queries.record(statement, seconds, parameters)
+        if self.settings.mode != "strict":
+            return
+        # Raised from the statement execution, so the handler fails with 500
+        # and its transaction is rolled back
+        if queries.count > (limit := self.limit(queries.scope)):
+            raise QueryBudgetExceeded(
+                f"{queries.route} ran more than {limit} SQL statements"
+            )
+        if repeats >= self.settings.repeat_threshold:
+            raise QueryBudgetExceeded(
+                f"{queries.route} ran the same statement {repeats} times: {statement}"
+            )
+
+    def check(self, queries: RequestQueries):
+        limit = self.limit(queries.scope)
+        if queries.count <= limit and not queries.repeated(
+            self.settings.repeat_threshold
+        ):
+            return
+        report = queries.report(self.settings.repeat_threshold)
+        report["budget"] = limit
+        if queries.count > limit:
+            logger.warning(
+                f"{queries.route} ran {queries.count} SQL statements, "
+                f"budget is {limit}",
+                extra={"fields": report},
+            )
+        if report["n_plus_one"]:
+            logger.warning(
+                f"{queries.route} ran {len(report['n_plus_one'])} statement(s) "
+                "over and over with other parameters, possible N+1 queries",
+                extra={"fields": report},
+            )
+        if report["repeated"]:
+            logger.warning(
+                f"{queries.route} repeated {len(report['repeated'])} "
+                "statement(s) with the same parameters",
+                extra={"fields": report},
+            )
+
+
+query_budget = QueryBudget(get_query_budget_settings())
+
+
+class QueryBudgetMiddleware:
+    def __init__(self, app: ASGIApp, budget: QueryBudget):
+        self.app = app
+        self.budget = budget
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        queries = RequestQueries(scope)
+        token = _current.set(queries)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current.reset(token)
+            self.budget.check(queries)
+            for observer in _observers:
+                observer(queries)
+
+
+@contextmanager
+def assert_max_queries(limit: int) -> Iterator[list[RequestQueries]]:
+    """
+    Fails if any request served inside the block ran more than `limit`
+    statements. Needs QUERY_BUDGET_MODE other than off.
+
+    >>> with assert_max_queries(3):
+    ...     client.get("/api/v1/users/1")
+    """
+    requests: list[RequestQueries] = []
+    _observers.append(requests.append)
+    try:
+        yield requests
+    finally:
+        _observers.remove(requests.append)
+    for queries in requests:
+        assert queries.count <= limit, (
+            f"{queries.route} ran {queries.count} SQL statements, "
+            f"expected at most {limit}:\n" + "\n".join(queries.shapes)
+        )
@@ -0,0 +1,119 @@
+"""
+Where the time of a request went: auth, permission, db and serialize phases
+summed in a context-local breakdown. Sent to the client as Server-Timing
+with an X-Request-ID, and attached to the access log record.
+"""
+
+import re
+import time
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.configs.log_settings import log_context
+
+PHASES = ("auth", "permission", "db", "serialize")
+REQUEST_ID_HEADER = "X-Request-ID"
+# A request id sent by a proxy or the client is kept if it looks like one
+_REQUEST_ID = re.compile(r"[\w.\-]{1,128}")
+
+
+class RequestTimings:
+    __slots__ = ("phases", "request_id", "started", "total")
+
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self.started = time.perf_counter()
+        self.total: float | None = None
+        self.phases = dict.fromkeys(PHASES, 0.0)
+
+    def add(self, name: str, seconds: float):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def milliseconds(self) -> dict[str, float]:
+        total = self.total or time.perf_counter() - self.started
+        return {
+            **{name: round(seconds * 1000, 3) for name, seconds in self.phases.items()},
+            "total": round(total * 1000, 3),
+        }
+
+    def server_timing(self) -> str:
+        return ", ".join(f"{name};dur={ms}" for name, ms in self.milliseconds().items())
+
+
+_current: ContextVar[RequestTimings | None] = ContextVar("_current", default=None)
+
+
+def add(name: str, seconds: float):
+    timings = _current.get()
+    if timings is not None:
+        timings.add(name, seconds)
+
+
+def request_id() -> str:
+    timings = _current.get()
+    return timings.request_id if timings is not None else uuid.uuid4().hex
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - started)
+
+
+def _request_id(scope: Scope) -> str:
+    for name, value in scope["headers"]:
+        if name == b"x-request-id":
+            value = value.decode("latin-1")
+            if _REQUEST_ID.fullmatch(value):
+                return value
+    return uuid.uuid4().hex
+
+
+class TimingMiddleware:
+    """
+    The phases are final when the response starts, except for streamed
+    bodies: the database time of a stream shows up in neither the header
+    nor the access log, which are both written at the response start.
+    """
+
+    def __init__(self, app: ASGIApp, server_timing: bool = True):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        timings = RequestTimings(_request_id(scope))
+        # Fields of every log record of the request, uvicorn's access record
+        # included, which is logged when the response starts
+        fields = {"request_id": timings.request_id}
+
+        async def send_timings(message: Message):
+            if message["type"] == "http.response.start":
+                timings.total = time.perf_counter() - timings.started
+                fields["timings_ms"] = timings.milliseconds()
+                headers = MutableHeaders(scope=message)
+                headers.append(REQUEST_ID_HEADER, timings.request_id)
+                if self.server_timing:
+                    headers.append("Server-Timing", timings.server_timing())
+            await send(message)
+
+        token = _current.set(timings)
+        log_token = log_context.set(fields)
+        try:
+            await self.app(scope, receive, send_timings)
+        finally:
+            log_context.reset(log_token)
+            _current.reset(token)
@@ -1,28 +1,91 @@
-from collections.abc import Callable
 from contextlib import asynccontextmanager
-from typing import Any
 
 import uvicorn
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
-from sqlmodel import create_engine
+from fastapi.responses import JSONResponse, PlainTextResponse
+from sqlmodel import Session
 from starlette.middleware.cors import CORSMiddleware
 
-from app.api.dependencies.db import get_session
-from app.api.v1 import routers as routers_v1
-from app.configs import LogConfig, get_appsettings, get_database_settings, get_logger
+from app.api.dependencies import (
+    is_admin_request,
+    permission_cache,
+    reference_cache,
+    session_tracker,
+    settings_resolver,
+)
+from app.api.services import JWT, AsyncPasswordHasher
+from app.api.v1 import async_routers, routers
+from app.configs import (
+    LogConfig,
+    get_appsettings,
+    get_database_settings,
+    get_hashing_settings,
+    get_logger,
+    get_metrics_settings,
+    get_query_budget_settings,
+    get_timing_settings,
+)
+from app.core.database.engine import (
+    create_async_db_engine,
+    create_db_engine,
+    pool_status,
+)
+from app.core.database.routing import READ_METHODS, READ_PRIMARY_COOKIE, ReplicaSet
+from app.core.database.slow_queries import slow_query_log
+from app.core.metrics import MetricsMiddleware, render
+from app.core.profiler import ProfilerMiddleware, profiler
+from app.core.queries import QueryBudgetMiddleware, query_budget
+from app.core.timing import TimingMiddleware
 
 logger = get_logger()
 
 settings = get_appsettings()
 db_settings = get_database_settings()
+metrics_settings = get_metrics_settings()
+query_budget_settings = get_query_budget_settings()
+timing_settings = get_timing_settings()
+routers_v1 = async_routers if db_settings.async_mode else routers
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # For activation of connections, creds and etc...
-    app.state.db_engine = create_engine(db_settings.pg_dsn)
+    app.state.db_engine = create_db_engine(db_settings)
+    app.state.db_replicas = ReplicaSet(
+        [
+            create_db_engine(db_settings, name=f"replica_{i}", dsn=dsn)
+            for i, dsn in enumerate(db_settings.replica_dsns)
+        ],
+        db_settings.replica_strategy,
+    )
+    if db_settings.async_mode:
+        app.state.async_db_engine = create_async_db_engine(db_settings)
+        app.state.async_db_replicas = ReplicaSet(
+            [
+                create_async_db_engine(db_settings, name=f"replica_{i}_async", dsn=dsn)
+                for i, dsn in enumerate(db_settings.replica_dsns)
+            ],
+            db_settings.replica_strategy,
+        )
+    app.state.password_hasher = AsyncPasswordHasher(get_hashing_settings())
+    settings_resolver.bind(app.state.db_engine)
+    try:
+        with Session(app.state.db_engine) as session:
+            reference_cache.load_all(session)
+            settings_resolver.load(session)
+    except Exception as e:
+        # Not fatal: every table is loaded again on its first read
+        logger.error(f"Reference tables were not loaded: {e}")
     yield
+    app.state.password_hasher.shutdown()
+    slow_query_log.shutdown()
+    if db_settings.async_mode:
+        for engine in app.state.async_db_replicas.engines:
+            await engine.dispose()
+        await app.state.async_db_engine.dispose()
+    for engine in app.state.db_replicas.engines:
+        engine.dispose()
+    app.state.db_engine.dispose()
 
 
 app = FastAPI(
@@ -33,23 +96,15 @@ app = FastAPI(
 )
 
 
-@app.middleware("http")
-def db_session_middleware(request: Request, call_next: Callable[[Request], Any]) -> Any:
-    try:
-        request.state.db = get_session(request.app.state.db_engine)
-        response = call_next(request)
-    except Exception as e:
-        logger.error(e)
-        raise RuntimeError(e) from e
-    return response
-
-
 app.include_router(routers_v1.companies, prefix="/api/v1")
 app.include_router(routers_v1.users, prefix="/api/v1")
 app.include_router(routers_v1.auth, prefix="/api/v1")
 app.include_router(routers_v1.settings, prefix="/api/v1")
 app.include_router(routers_v1.roles, prefix="/api/v1")
 app.include_router(routers_v1.groups, prefix="/api/v1")
+app.include_router(routers_v1.exports, prefix="/api/v1")
+app.include_router(routers_v1.dicts, prefix="/api/v1")
+app.include_router(routers_v1.admin, prefix="/api/v1")
 
 
 @app.get("/health", tags=["health check"])
@@ -57,6 +112,78 @@ def health():
     return JSONResponse(content={"status": "ok"}, status_code=200)
 
 
+@app.get("/health/hashing", tags=["health check"])
+def health_hashing(request: Request):
+    return JSONResponse(
+        content=request.app.state.password_hasher.metrics(), status_code=200
+    )
+
+
+def _pools(state) -> dict:
+    # Named as in lifespan
+    pools = {"primary": pool_status(state.db_engine, "primary")}
+    for i, engine in enumerate(state.db_replicas.engines):
+        name = f"replica_{i}"
+        pools[name] = pool_status(engine, name)
+    if db_settings.async_mode:
+        pools["primary_async"] = pool_status(state.async_db_engine, "primary_async")
+        for i, engine in enumerate(state.async_db_replicas.engines):
+            name = f"replica_{i}_async"
+            pools[name] = pool_status(engine, name)
+    return pools
+
+
+def _caches() -> dict:
+    return {
+        "jwt": JWT.cache.metrics(),
+        "permissions": permission_cache.metrics(),
+        "reference": reference_cache.metrics(),
+    }
+
+
+@app.get("/health/db", tags=["health check"])
+def health_db(request: Request):
+    return JSONResponse(
+        content={
+            "pools": _pools(request.app.state),
+            "sessions": session_tracker.metrics(),
+        },
+        status_code=200,
+    )
+
+
+@app.get("/health/caches", tags=["health check"])
+def health_caches():
+    return JSONResponse(content=_caches(), status_code=200)
+
+
+if metrics_settings.enabled:
+
+    @app.get("/metrics", tags=["health check"], response_class=PlainTextResponse)
+    def metrics(request: Request):
+        return PlainTextResponse(
+            render(_pools(request.app.state), _caches()),
+            media_type="text/plain; version=0.0.4; charset=utf-8",
+        )
+
+
+if db_settings.replica_dsns and db_settings.replica_sticky_seconds:
+
+    @app.middleware("http")
+    async def sticky_primary_middleware(request: Request, call_next):
+        # Replicas lag behind, so a client that has just written reads from
+        # the primary until the cookie expires
+        response = await call_next(request)
+        if request.method not in READ_METHODS and response.status_code < 400:
+            response.set_cookie(
+                READ_PRIMARY_COOKIE,
+                "1",
+                max_age=db_settings.replica_sticky_seconds,
+                httponly=True,
+            )
+        return response
+
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origins,
@@ -65,6 +192,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Inside TimingMiddleware: profiles are named after the request id
+app.add_middleware(ProfilerMiddleware, profiler=profiler, is_admin=is_admin_request)
+
+if query_budget_settings.mode != "off":
+    # Inside TimingMiddleware too, so its warnings carry the request id
+    app.add_middleware(QueryBudgetMiddleware, budget=query_budget)
+
+app.add_middleware(TimingMiddleware, server_timing=timing_settings.server_timing)
+
+if metrics_settings.enabled:
+    # Added last, so it is the outermost middleware and times the others too
+    app.add_middleware(MetricsMiddleware)
+
 
 def main():
     logger.info("Starting web app...")
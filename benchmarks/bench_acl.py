@@ -0,0 +1,43 @@
+"""
+Micro-benchmark of the ACL check: set membership over the user's function
+rows (the former check_permissions loop) against the compiled bitmask.
+
+>>> python -m benchmarks.bench_acl
+"""
+
+import timeit
+from functools import partial
+
+from app.core.permissions.acl import ACL, Functions, Scope, functions_mask, has_access
+
+NUMBER = 1_000_000
+
+
+def set_check(codes: list[str], scope: Scope) -> bool:
+    for code in codes:
+        if code in ACL[scope]:
+            return True
+    return False
+
+
+def mask_check(mask: int, scope: Scope) -> bool:
+    return has_access(mask, scope)
+
+
+def main():
+    cases = {
+        "granted (last row)": [Functions.read_users.value, Functions.manage_all.value],
+        "denied": [Functions.read_users.value, Functions.list_users.value],
+    }
+    for name, codes in cases.items():
+        mask = functions_mask(codes)
+        for label, func, arg in (
+            ("set", set_check, codes),
+            ("mask", mask_check, mask),
+        ):
+            seconds = timeit.timeit(partial(func, arg, Scope.roles), number=NUMBER)
+            print(f"{name:<20} {label:<5} {seconds / NUMBER * 1e9:8.1f} ns/check")
+
+
+if __name__ == "__main__":
+    main()
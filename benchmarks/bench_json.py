@@ -0,0 +1,84 @@
+"""
+Requests/s of list_companies with 10k rows: ORM objects re-validated
+through the `list[Companies]` response model (before) against projected
+rows rendered by FastJSONResponse (after). Runs on an in-memory SQLite
+database, so it measures the app side only.
+
+>>> python -m benchmarks.bench_json
+"""
+
+import datetime
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, create_engine, insert, select
+
+from app.api.dependencies import Projection
+from app.api.responses import FastJSONResponse
+from app.core.database.models import Companies
+
+ROWS = 10_000
+DURATION = 5.0
+
+engine = create_engine(
+    "sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False}
+)
+Companies.__table__.create(engine)
+with Session(engine) as session:
+    session.exec(
+        insert(Companies),
+        params=[
+            {
+                "id": i,
+                "property_id": 1,
+                "name": f"Компания {i}",
+                "created_date": datetime.date(2024, 1, 1)
+                + datetime.timedelta(days=i % 365),
+                "inn": f"{7700000000 + i}",
+                "kpp": "770001001",
+                "ogrn": None,
+                "bic": "044525225",
+            }
+            for i in range(1, ROWS + 1)
+        ],
+    )
+    session.commit()
+
+app = FastAPI()
+
+
+@app.get("/before")
+def before() -> list[Companies]:
+    with Session(engine) as session:
+        return session.exec(select(Companies).order_by(Companies.id)).fetchall()
+
+
+@app.get("/after")
+def after():
+    with Session(engine) as session:
+        statement = select(*Companies.__table__.columns).order_by(Companies.id)
+        rows = session.exec(statement).fetchall()
+    return FastJSONResponse(Projection.rows(rows))
+
+
+def measure(client: TestClient, url: str) -> float:
+    requests = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < DURATION:
+        client.get(url)
+        requests += 1
+    return requests / (time.perf_counter() - started)
+
+
+def main():
+    with TestClient(app) as client:
+        # ORM instances are dumped in attribute load order, so compare values
+        assert client.get("/before").json() == client.get("/after").json()
+        for url in ("/before", "/after"):
+            print(f"{url:<8} {measure(client, url):8.1f} req/s ({ROWS} rows)")
+
+
+if __name__ == "__main__":
+    main()
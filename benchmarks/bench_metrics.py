@@ -0,0 +1,100 @@
+"""
+Overhead of /metrics collection on a list_companies page: the same handler
+served plain and behind MetricsMiddleware with SQL statement events on its
+engine. Requests alternate between the two apps and the median latencies
+are compared, which keeps machine noise out of the result.
+Runs on in-memory SQLite databases, so it measures the app side only.
+
+>>> python -m benchmarks.bench_metrics
+"""
+
+import datetime
+import statistics
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, create_engine, insert, select
+
+from app.api.dependencies import Projection
+from app.api.responses import FastJSONResponse
+from app.configs import get_page_settings
+from app.core.database.models import Companies
+from app.core.metrics import MetricsMiddleware, track_statements
+
+ROWS = 1_000
+PAGE = get_page_settings().default_limit
+REQUESTS = 5_000
+
+
+def make_engine():
+    engine = create_engine(
+        "sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False}
+    )
+    Companies.__table__.create(engine)
+    with Session(engine) as session:
+        session.exec(
+            insert(Companies),
+            params=[
+                {
+                    "id": i,
+                    "property_id": 1,
+                    "name": f"Компания {i}",
+                    "created_date": datetime.date(2024, 1, 1),
+                    "inn": f"{7700000000 + i}",
+                    "kpp": "770001001",
+                    "ogrn": None,
+                    "bic": "044525225",
+                }
+                for i in range(1, ROWS + 1)
+            ],
+        )
+        session.commit()
+    return engine
+
+
+def make_app(instrumented: bool) -> FastAPI:
+    engine = make_engine()
+    app = FastAPI()
+
+    @app.get("/companies/")
+    def list_companies():
+        with Session(engine) as session:
+            statement = (
+                select(*Companies.__table__.columns).order_by(Companies.id).limit(PAGE)
+            )
+            rows = session.exec(statement).fetchall()
+        return FastJSONResponse(Projection.rows(rows))
+
+    if instrumented:
+        track_statements(engine)
+        app.add_middleware(MetricsMiddleware)
+    return app
+
+
+def latency(client: TestClient) -> float:
+    started = time.perf_counter()
+    client.get("/companies/")
+    return time.perf_counter() - started
+
+
+def main():
+    latencies = {"plain": [], "metrics": []}
+    with (
+        TestClient(make_app(False)) as plain,
+        TestClient(make_app(True)) as instrumented,
+    ):
+        clients = {"plain": plain, "metrics": instrumented}
+        for i in range(REQUESTS):
+            # Which app goes first flips every round
+            for name in sorted(clients, reverse=i % 2 == 1):
+                latencies[name].append(latency(clients[name]))
+    medians = {name: statistics.median(values) for name, values in latencies.items()}
+    for name, median in medians.items():
+        print(f"{name:<8} {median * 1e6:8.1f} us/request (median)")
+    print(f"overhead {medians['metrics'] / medians['plain'] - 1:8.2%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
 CREATE TABLE users(
   id bigserial NOT NULL,
   company_id bigserial NOT NULL,
@@ -22,6 +24,10 @@ CREATE INDEX idx_users_username_user_lock ON users(username, user_lock);
 CREATE INDEX idx_users_id_company_id ON users(id, company_id);
 CREATE INDEX idx_users_id_group_id ON users(id, group_id);
 CREATE INDEX idx_users_id_property_id ON users(id);
+CREATE INDEX idx_users_created_date_id ON users(created_date, id);
+CREATE INDEX idx_users_lastname_trgm ON users USING gin(lastname gin_trgm_ops);
+CREATE INDEX idx_users_firtsname_trgm ON users USING gin(firtsname gin_trgm_ops);
+CREATE INDEX idx_users_username_trgm ON users USING gin(username gin_trgm_ops);
 COMMENT ON TABLE users IS 'Таблица пользователей';
 
 CREATE TABLE IF NOT EXISTS mimicry (
@@ -56,6 +62,8 @@ CREATE INDEX idx_companies_kpp ON companies(kpp);
 CREATE INDEX idx_companies_ogrn ON companies(ogrn);
 CREATE INDEX idx_companies_bic ON companies(bic);
 CREATE INDEX idx_companies_property_id ON companies(property_id);
+CREATE INDEX idx_companies_created_date_id ON companies(created_date, id);
+CREATE INDEX idx_companies_name_trgm ON companies USING gin("name" gin_trgm_ops);
 COMMENT ON TABLE companies IS 'Таблица с компаниями';
 
 
@@ -0,0 +1,41 @@
+from collections.abc import Callable, Iterator
+
+import pytest
+from sqlmodel import Session, create_engine, select
+
+from app.api.dependencies import permission_cache
+from app.api.services import JWT, JwtPayload
+from app.configs import get_database_settings
+from app.core.database.models import Users
+from app.core.permissions.acl import Functions, functions_mask
+
+engine = create_engine(get_database_settings().pg_dsn)
+
+
+@pytest.fixture()
+def bearer() -> Iterator[Callable[..., dict[str, str]]]:
+    """
+    Authorization header of an unlocked user granted the given functions.
+    The grant goes through the permission cache, so the user's roles in the
+    database are left alone.
+
+    >>> client.get("api/v1/export/companies", headers=bearer(Functions.export_data))
+    """
+    granted = []
+
+    def grant(*functions: Functions) -> dict[str, str]:
+        with Session(engine) as session:
+            user_id = session.exec(
+                select(Users.id).where(Users.user_lock.is_not(True)).order_by(Users.id)
+            ).first()
+        mask = functions_mask(functions)
+        permission_cache.put(user_id, frozenset(), mask)
+        granted.append(user_id)
+        token = JWT.generate_token(
+            JwtPayload(sub=str(user_id), user_id=user_id, acl=mask)
+        )
+        return {"Authorization": f"Bearer {token}"}
+
+    yield grant
+    for user_id in granted:
+        permission_cache.invalidate_user(user_id)
@@ -1,11 +1,22 @@
+import csv
+import datetime
+import io
+import json
+
 from fastapi.testclient import TestClient
+from sqlmodel import Session, create_engine, func, select, text
 
+from app.api.dependencies import CompanyFilter
 from app.api.models.companies import CreateCompany
+from app.configs import get_database_settings
 from app.core.database.models import Companies
+from app.core.permissions.acl import Functions
 from app.main import app
 
 ENDPOINT = "api/v1/companies/"
 
+engine = create_engine(get_database_settings().pg_dsn)
+
 
 def test_get_company():
     company_id = "1"
@@ -54,3 +65,56 @@ def test_create_delete_company():
     assert response.status_code == 201
     response_json = response.json()
     print(f"{response_json=}")
+
+
+def test_company_filters_use_indexes():
+    filters = CompanyFilter(
+        inn="3375642255",
+        kpp="562596571",
+        ogrn=None,
+        bic=None,
+        property_id=None,
+        created_from=datetime.date(2024, 1, 1),
+        created_to=None,
+    )
+    statement = filters.apply(select(Companies.id)).order_by(Companies.id).limit(100)
+    sql = statement.compile(engine, compile_kwargs={"literal_binds": True})
+    with Session(engine) as session:
+        # The test database is too small for an index to beat a scan: seed
+        # enough companies and fresh statistics, both rolled back at the end
+        session.exec(
+            text(
+                """
+                INSERT INTO companies (property_id, name, created_date, inn, kpp)
+                SELECT (SELECT id FROM property_code_dict LIMIT 1), 'Plan ' || n,
+                    DATE '2020-01-01' + n % 2000, lpad(n::text, 10, '0'),
+                    lpad((n % 500)::text, 9, '0')
+                FROM generate_series(1, 50000) AS n
+                """
+            )
+        )
+        session.exec(text("ANALYZE companies"))
+        plan = "\n".join(row[0] for row in session.exec(text(f"EXPLAIN {sql}")))
+        session.rollback()
+    assert "Seq Scan" not in plan
+    assert "idx_companies_" in plan
+
+
+def test_export_companies(bearer):
+    with Session(engine) as session:
+        count = session.exec(select(func.count()).select_from(Companies)).one()
+    headers = bearer(Functions.export_data)
+    with TestClient(app) as client:
+        as_csv = client.get("api/v1/export/companies", headers=headers)
+        as_ndjson = client.get(
+            "api/v1/export/companies",
+            params={"format": "ndjson"},
+            headers={**headers, "Accept-Encoding": "gzip"},
+        )
+    assert as_csv.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(as_csv.text)))
+    assert len(rows) == count
+    assert as_ndjson.headers["Content-Encoding"] == "gzip"
+    # httpx decompresses the body
+    records = [json.loads(line) for line in as_ndjson.text.splitlines()]
+    assert [record["id"] for record in records] == [int(row["id"]) for row in rows]
@@ -4,6 +4,8 @@ from sqlmodel import Session, create_engine, select
 
 from app.configs import get_database_settings
 from app.core.database.models import Companies, TimezoneDict, UserGroups, Users
+from app.core.permissions.acl import Functions
+from app.core.queries import assert_max_queries
 from app.main import app
 
 settings = get_database_settings()
@@ -28,6 +30,14 @@ def test_get_user():
     # assert response.json() == {"msg": "Hello World"}
 
 
+def test_get_user_queries(bearer):
+    headers = bearer(Functions.read_users)
+    # Principal, permission check and the user row
+    with TestClient(app) as client, assert_max_queries(3):
+        response = client.get(ENDPOINT + "1", headers=headers)
+    assert response.status_code == 200
+
+
 def test_list_users():
     with TestClient(app) as client:
         response = client.get(ENDPOINT)
@@ -39,6 +49,20 @@ def test_list_users():
     print(f"{response_json=}")
 
 
+def test_search_users(bearer):
+    with TestClient(app) as client:
+        response = client.get(
+            ENDPOINT + "search",
+            params={"q": "Иван", "limit": 5},
+            headers=bearer(Functions.list_users),
+        )
+    assert response.status_code == 200
+    response_json = response.json()
+    assert len(response_json) <= 5
+    scores = [user["score"] for user in response_json]
+    assert scores == sorted(scores, reverse=True)
+
+
 db_settings = get_database_settings()
 engine = create_engine(db_settings.pg_dsn)
 
@@ -98,3 +122,31 @@ def test_create_delete_user(user_group_id: int, company_id: int, timezone_id: in
     assert response.status_code == 201
     response_json = response.json()
     print(f"{response_json=}")
+
+
+def test_import_users(bearer, user_group_id: int, company_id: int, timezone_id: int):
+    header = "company_id,group_id,timezone_id,username,firtsname,lastname,password"
+    body = "\n".join(
+        [
+            header,
+            f"{company_id},{user_group_id},{timezone_id},IMPORT USER,John,Doe,pass",
+            f"{company_id},{user_group_id},{timezone_id},IMPORT USER,Jane,Doe,pass",
+            f"{company_id},{user_group_id},-1,BAD TIMEZONE,John,Doe,pass",
+        ]
+    )
+    with TestClient(app) as client:
+        response = client.post(
+            ENDPOINT + "import",
+            content=body,
+            headers={**bearer(Functions.import_data), "Content-Type": "text/csv"},
+            params={"skip_invalid": True},
+        )
+    assert response.status_code == 201
+    response_json = response.json()
+    assert response_json["created"] == 1
+    assert [error["line"] for error in response_json["errors"]] == [3, 4]
+
+    with Session(engine) as session:
+        user = session.exec(select(Users).where(Users.username == "IMPORT USER")).one()
+        session.delete(user)
+        session.commit()
@@ -0,0 +1,28 @@
+from itertools import combinations
+
+from app.core.permissions.acl import (
+    ACL,
+    FUNCTION_BITS,
+    Functions,
+    Scope,
+    functions_mask,
+    has_access,
+)
+
+
+def test_every_function_owns_a_bit():
+    assert len(set(FUNCTION_BITS.values())) == len(Functions)
+
+
+def test_unknown_codes_are_ignored():
+    assert functions_mask(["unknown_function"]) == 0
+
+
+def test_mask_matches_set_membership():
+    functions = list(Functions)
+    for size in range(len(functions) + 1):
+        for granted in combinations(functions, size):
+            mask = functions_mask(granted)
+            for scope in Scope:
+                expected = any(code in ACL[scope] for code in granted)
+                assert has_access(mask, scope) is expected
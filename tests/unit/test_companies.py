@@ -0,0 +1,48 @@
+import datetime
+from types import SimpleNamespace
+
+from app.api.models.companies import CompanyProperty, CreateCompany
+from app.api.services.companies import _dependents
+from app.core.database.models import Companies, UserGroups
+
+
+def create(name: str, group: str | None = None, properties=()) -> CreateCompany:
+    return CreateCompany(
+        company=Companies(
+            property_id=1,
+            name=name,
+            created_date=datetime.date(2025, 1, 1),
+            inn="7700000000",
+            kpp="770001001",
+        ),
+        user_group=None if group is None else UserGroups(group_name=group),
+        properties=[
+            CompanyProperty(property_code_id=code, value=value)
+            for code, value in properties
+        ],
+    )
+
+
+def test_groups_and_properties_get_the_returned_ids():
+    creates = [
+        create("Acme", properties=[(1, "a"), (2, None)]),
+        create("Globex", group="Sales"),
+        create("Initech", properties=[(3, "c")]),
+    ]
+    # As INSERT ... RETURNING hands them back, in the order of the parameters
+    companies = [
+        SimpleNamespace(id=10, name="Acme"),
+        SimpleNamespace(id=11, name="Globex"),
+        SimpleNamespace(id=12, name="Initech"),
+    ]
+    groups, properties = _dependents(creates, companies)
+    assert groups == [
+        {"group_name": "Acme", "comment": "Default group", "company_id": 10},
+        {"group_name": "Sales", "comment": None, "company_id": 11},
+        {"group_name": "Initech", "comment": "Default group", "company_id": 12},
+    ]
+    assert properties == [
+        {"property_code_id": 1, "value": "a", "company_id": 10},
+        {"property_code_id": 2, "value": None, "company_id": 10},
+        {"property_code_id": 3, "value": "c", "company_id": 12},
+    ]
@@ -0,0 +1,29 @@
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import QueuePool
+
+from app.core.database.engine import _instrument, get_pool_metrics
+
+
+def test_overlapping_connects_are_all_timed():
+    # Two pools sharing the metrics, so the second connect can't wait on the
+    # first one's pool
+    engine, other = (
+        create_engine("sqlite://", poolclass=QueuePool, pool_logging_name="test")
+        for _ in range(2)
+    )
+    _instrument(engine, "test")
+    _instrument(other, "test")
+    nested = []
+
+    # A second connect starts while the first one is still connecting, on the
+    # same thread, as async connects do on the event loop
+    @event.listens_for(engine, "do_connect")
+    def _connect_another(dialect, conn_rec, cargs, cparams):
+        nested.append(other.connect())
+
+    with engine.connect():
+        pass
+    nested[0].close()
+    metrics = get_pool_metrics("test")
+    assert metrics.connects == 2
+    assert 0 < metrics.connect_seconds_max
@@ -0,0 +1,21 @@
+import pytest
+
+from app.api.dependencies.exports import _accepts_gzip
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("gzip, deflate, br", True),
+        ("br;q=1.0, gzip;q=0.5", True),
+        ("*", True),
+        ("", False),
+        ("identity", False),
+        ("gzip;q=0", False),
+        ("gzip;q=0.000, *", False),
+        ("*;q=0", False),
+        ("x-gzip", True),
+    ],
+)
+def test_gzip_follows_accept_encoding_qualities(header, expected):
+    assert _accepts_gzip(header) is expected
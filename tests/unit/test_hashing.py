@@ -0,0 +1,28 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.api.services import AsyncPasswordHasher, HashingQueueFull
+from app.configs.settings import HashingSettings
+
+
+def test_jobs_above_workers_and_queue_are_rejected():
+    hasher = AsyncPasswordHasher(HashingSettings(workers=1, max_queue=2))
+    release = threading.Event()
+
+    async def main():
+        jobs = [asyncio.create_task(hasher._run(release.wait)) for _ in range(3)]
+        await asyncio.sleep(0)
+        assert hasher.queue_depth == 2
+        with pytest.raises(HashingQueueFull):
+            await hasher.hash_password("secret")
+        release.set()
+        await asyncio.gather(*jobs)
+
+    try:
+        asyncio.run(main())
+    finally:
+        hasher.shutdown()
+    assert hasher.rejected == 1
+    assert hasher.completed == 3
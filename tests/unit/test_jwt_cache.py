@@ -0,0 +1,53 @@
+import time
+
+import pytest
+
+from app.api.services import JWT, InvalidTokenError, JwtPayload, TokenCache
+
+
+def _payload(user_id: int = 1) -> JwtPayload:
+    return JwtPayload(sub="test", user_id=user_id)
+
+
+def test_cache_hit_and_miss():
+    cache = TokenCache(maxsize=10)
+    payload = _payload()
+    assert cache.get("token") is None
+    cache.put("token", payload, int(time.time()) + 60)
+    assert cache.get("token") is payload
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_cache_evicts_at_exp():
+    cache = TokenCache(maxsize=10)
+    cache.put("token", _payload(), int(time.time()) - 1)
+    assert cache.get("token") is None
+    assert cache.metrics()["size"] == 0
+
+
+def test_cache_ttl_caps_exp():
+    cache = TokenCache(maxsize=10, ttl=0)
+    cache.put("token", _payload(), int(time.time()) + 60)
+    assert cache.get("token") is None
+
+
+def test_cache_is_bounded_lru():
+    cache = TokenCache(maxsize=2)
+    exp = int(time.time()) + 60
+    cache.put("a", _payload(1), exp)
+    cache.put("b", _payload(2), exp)
+    cache.get("a")
+    cache.put("c", _payload(3), exp)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+
+def test_revoked_token_is_rejected():
+    token = JWT.generate_token(_payload())
+    payload = JWT.verify(token)
+    assert JWT.verify(token) is payload
+
+    JWT.revoke(token)
+    with pytest.raises(InvalidTokenError):
+        JWT.verify(token)
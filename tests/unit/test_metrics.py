@@ -0,0 +1,25 @@
+from app.core.metrics import Counter, Histogram
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency_seconds", "Latency", ("route",), (0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(("/a",), value)
+    lines = list(histogram.render())
+    assert lines[:2] == [
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+    ]
+    assert lines[2:] == [
+        'latency_seconds_bucket{route="/a",le="0.1"} 2',
+        'latency_seconds_bucket{route="/a",le="1.0"} 3',
+        'latency_seconds_bucket{route="/a",le="+Inf"} 4',
+        'latency_seconds_sum{route="/a"} 2.65',
+        'latency_seconds_count{route="/a"} 4',
+    ]
+
+
+def test_label_values_are_escaped():
+    counter = Counter("requests_total", "Requests", ("route",))
+    counter.inc(('/a"b\\',))
+    assert list(counter.render())[-1] == 'requests_total{route="/a\\"b\\\\"} 1'
@@ -0,0 +1,45 @@
+import datetime
+
+import pytest
+from fastapi import Response
+from starlette.exceptions import HTTPException
+from starlette.requests import Request
+
+from app.api.dependencies.pagination import KeysetPage, decode_cursor, encode_cursor
+from app.core.database.models import RolesDict, Users
+
+
+def test_cursor_round_trip():
+    keys = (Users.created_date, Users.id)
+    cursor = encode_cursor(keys, [datetime.date(2024, 2, 1), 42])
+    assert decode_cursor(cursor, keys) == [datetime.date(2024, 2, 1), 42]
+
+
+def test_cursor_of_other_sort_order_is_rejected():
+    cursor = encode_cursor((Users.id,), [42])
+    with pytest.raises(HTTPException) as e:
+        decode_cursor(cursor, (Users.created_date, Users.id))
+    assert e.value.status_code == 400
+
+
+@pytest.mark.parametrize("value", ["x", True, 1.5, None])
+def test_cursor_value_of_wrong_type_is_rejected(value):
+    cursor = encode_cursor((Users.id,), [value])
+    with pytest.raises(HTTPException) as e:
+        decode_cursor(cursor, (Users.id,))
+    assert e.value.status_code == 400
+
+
+def test_slice_pages_rows_in_memory():
+    request = Request(
+        {"type": "http", "path": "/roles/", "query_string": b"", "headers": []}
+    )
+    rows = [{"id": i} for i in range(1, 6)]
+    pages, after = [], None
+    while True:
+        page = KeysetPage(request, Response(), limit=2, after=after)
+        pages.append([row["id"] for row in page.slice(rows, RolesDict.id)])
+        after = page.response.headers.get("X-Next-Cursor")
+        if after is None:
+            break
+    assert pages == [[1, 2], [3, 4], [5]]
@@ -0,0 +1,75 @@
+import pytest
+from starlette.exceptions import HTTPException
+
+from app.api.dependencies import (
+    Scope,
+    check_permissions,
+    get_user_mask,
+    permission_cache,
+)
+from app.api.models.users import Principal
+from app.core.permissions.acl import Functions, functions_mask
+from app.core.permissions.cache import PermissionCache
+
+
+def test_warm_cache_skips_database():
+    mask = functions_mask([Functions.manage_users])
+    permission_cache.put(42, frozenset({1}), mask)
+    # session is never touched on a warm cache
+    assert get_user_mask(42, session=None) == mask
+    permission_cache.invalidate_user(42)
+
+
+def test_check_permissions_by_scope():
+    principal = Principal(
+        id=42,
+        company_id=1,
+        group_id=1,
+        timezone_id=1,
+        username="test",
+        firtsname="John",
+        lastname="Doe",
+        created_date="2025-01-01",
+        user_lock=False,
+        acl=functions_mask([Functions.manage_users]),
+    )
+    assert check_permissions(principal, Scope.users)
+    with pytest.raises(HTTPException):
+        check_permissions(principal, Scope.companies)
+
+
+def test_invalidate_role_drops_only_its_users():
+    cache = PermissionCache(maxsize=10, ttl=60)
+    cache.put(1, frozenset({1}), 0b01)
+    cache.put(2, frozenset({2}), 0b10)
+    cache.invalidate_role(1)
+    assert cache.get(1) is None
+    assert cache.get(2) == 0b10
+
+
+def test_ttl_and_size_bounds():
+    cache = PermissionCache(maxsize=1, ttl=0)
+    cache.put(1, frozenset(), 0b1)
+    assert cache.get(1) is None
+
+    cache = PermissionCache(maxsize=1, ttl=60)
+    cache.put(1, frozenset(), 0)
+    cache.put(2, frozenset(), 0)
+    assert cache.get(1) is None
+    assert cache.get(2) == 0
+
+
+def test_mask_read_before_invalidation_is_not_cached():
+    cache = PermissionCache(maxsize=10, ttl=60)
+    generation = cache.generation(1)
+    cache.invalidate_user(1)
+    cache.put(1, frozenset({1}), 0b01, generation)
+    assert cache.get(1) is None
+
+    generation = cache.generation(2)
+    cache.invalidate_role(1)
+    cache.put(2, frozenset({1}), 0b01, generation)
+    assert cache.get(2) is None
+
+    cache.put(2, frozenset({1}), 0b01, cache.generation(2))
+    assert cache.get(2) == 0b01
@@ -0,0 +1,25 @@
+import cProfile
+import os
+
+from app.core.profiler import ProfileStore
+
+
+def test_store_keeps_latest_profiles(tmp_path):
+    store = ProfileStore(tmp_path, keep=2)
+    for age, name in enumerate(("first", "second", "third")):
+        profile = cProfile.Profile()
+        profile.enable()
+        sum(range(10))
+        profile.disable()
+        path = store.save(profile, name)
+        os.utime(path, (age, age))
+    names = {profile["name"] for profile in store.list()}
+    assert len(names) == 2
+    assert "first.prof" not in names
+    assert store.path("third.prof") is not None
+
+
+def test_store_rejects_paths_outside_directory(tmp_path):
+    store = ProfileStore(tmp_path / "profiles", keep=2)
+    (tmp_path / "secret.prof").write_bytes(b"")
+    assert store.path("../secret.prof") is None
@@ -0,0 +1,35 @@
+import pytest
+
+from app.configs.settings import QueryBudgetSettings
+from app.core.queries import QueryBudget, QueryBudgetExceeded, RequestQueries, _current
+
+
+def scope(path="/api/v1/users/"):
+    return {"type": "http", "method": "GET", "path": path}
+
+
+def test_repeated_statements_are_reported():
+    queries = RequestQueries(scope())
+    for user_id in range(3):
+        queries.record("SELECT * FROM users WHERE id = %(id)s", 0.001, {"id": user_id})
+    for _ in range(3):
+        queries.record("SELECT * FROM companies", 0.001)
+    queries.record("SELECT * FROM roles", 0.001)
+    assert queries.count == 7
+    report = queries.report(3)
+    assert report["n_plus_one"] == {"SELECT * FROM users WHERE id = %(id)s": 3}
+    assert report["repeated"] == {"SELECT * FROM companies": 3}
+
+
+def test_strict_mode_fails_over_route_budget():
+    budget = QueryBudget(
+        QueryBudgetSettings(mode="strict", routes={"GET /api/v1/users/": 2})
+    )
+    token = _current.set(RequestQueries(scope()))
+    try:
+        budget.record("SELECT 1", 0.001)
+        budget.record("SELECT 2", 0.001)
+        with pytest.raises(QueryBudgetExceeded):
+            budget.record("SELECT 3", 0.001)
+    finally:
+        _current.reset(token)
@@ -0,0 +1,86 @@
+import pytest
+from fastapi import Response
+from sqlmodel import Session, create_engine
+from starlette.requests import Request
+
+from app.api.dependencies import KeysetPage, reference_cache, reference_response
+from app.api.dependencies.reference import CACHE_CONTROL
+from app.core.database.models import StatusDict
+
+engine = create_engine("sqlite://")
+StatusDict.__table__.create(engine)
+with Session(engine) as session:
+    session.add_all(
+        [
+            StatusDict(id=1, code="new", name="New"),
+            StatusDict(id=2, code="done", name="Done"),
+        ]
+    )
+    session.commit()
+
+
+def request(if_none_match: str | None = None) -> Request:
+    headers = (
+        [] if if_none_match is None else [(b"if-none-match", if_none_match.encode())]
+    )
+    return Request(
+        {"type": "http", "path": "/dicts/", "query_string": b"", "headers": headers}
+    )
+
+
+def respond(http_request: Request, limit: int = 100) -> Response:
+    page = KeysetPage(http_request, Response(), limit=limit, after=None)
+    with Session(engine) as session:
+        table = reference_cache.load(session, StatusDict)
+    return reference_response(http_request, page, table, StatusDict.id)
+
+
+@pytest.fixture
+def tag() -> str:
+    return respond(request()).headers["ETag"]
+
+
+def test_full_table_is_sent_with_its_etag():
+    response = respond(request())
+    assert response.status_code == 200
+    assert response.headers["ETag"] == reference_cache.get(StatusDict).etag
+    assert response.headers["Cache-Control"] == CACHE_CONTROL
+    assert response.body.startswith(b'[{"id":1')
+
+
+@pytest.mark.parametrize("header", ["{tag}", "W/{tag}", '"other", {tag}', "*"])
+def test_matching_etag_is_not_modified(tag, header):
+    response = respond(request(header.format(tag=tag)))
+    assert response.status_code == 304
+    assert response.body == b""
+    assert response.headers["ETag"] == tag
+    assert response.headers["Cache-Control"] == CACHE_CONTROL
+
+
+def test_other_etag_gets_the_body(tag):
+    assert respond(request('"other"')).status_code == 200
+
+
+def test_page_has_an_etag_of_its_own(tag):
+    response = respond(request(tag), limit=1)
+    assert response.status_code == 200
+    assert response.headers["ETag"] != tag
+
+
+def test_commit_drops_written_table():
+    with Session(engine) as session:
+        reference_cache.load(session, StatusDict)
+        session.get(StatusDict, 1).name = "Created"
+        session.commit()
+    assert reference_cache.get(StatusDict) is None
+
+
+def test_rollback_keeps_table():
+    with Session(engine) as session:
+        reference_cache.load(session, StatusDict)
+        session.get(StatusDict, 2).name = "Finished"
+        session.flush()
+        session.rollback()
+        # The rolled back write is forgotten, not dropped with a later commit
+        session.commit()
+    assert reference_cache.get(StatusDict) is not None
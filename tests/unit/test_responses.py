@@ -0,0 +1,24 @@
+import datetime
+import decimal
+
+from pydantic import TypeAdapter
+
+from app.api.responses import FastJSONResponse
+
+ROWS = [
+    {
+        "id": 1,
+        "name": 'Щит "1"',
+        "created_date": datetime.date(2024, 1, 2),
+        "updated": datetime.datetime(2024, 1, 2, 3, 4, 5, tzinfo=datetime.UTC),
+        "timezone": datetime.time(3, 0, tzinfo=datetime.UTC),
+        "amount": decimal.Decimal("1.50"),
+        "ogrn": None,
+        "user_lock": False,
+    }
+]
+
+
+def test_same_bytes_as_response_model():
+    expected = TypeAdapter(list[dict]).dump_json(ROWS)
+    assert FastJSONResponse(ROWS).body == expected
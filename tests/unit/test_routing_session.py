@@ -0,0 +1,54 @@
+from sqlalchemy import insert
+from sqlalchemy.pool import QueuePool
+from sqlmodel import create_engine, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.database.models import Companies
+from app.core.database.routing import ReplicaSet, RoutingSession, read_primary
+
+primary = create_engine("sqlite://")
+replicas = [create_engine("sqlite://", poolclass=QueuePool) for _ in range(2)]
+
+
+def test_reads_go_to_replica_until_first_write():
+    session = RoutingSession(primary, replica=replicas[0])
+    assert session.get_bind(clause=select(Companies)) is replicas[0]
+    assert session.get_bind(clause=insert(Companies)) is primary
+    # read-after-write stays on the primary
+    assert session.get_bind(clause=select(Companies)) is primary
+    assert session.on_primary
+
+
+def test_read_primary_statement_does_not_stick():
+    session = RoutingSession(primary, replica=replicas[0])
+    statement = select(Companies).execution_options(read_primary=True)
+    assert session.get_bind(clause=statement) is primary
+    assert session.get_bind(clause=select(Companies)) is replicas[0]
+
+
+def test_without_replica_everything_goes_to_primary():
+    session = RoutingSession(primary)
+    assert session.get_bind(clause=select(Companies)) is primary
+
+
+def test_read_primary():
+    session = RoutingSession(primary, replica=replicas[0])
+    read_primary(session)
+    assert session.get_bind(clause=select(Companies)) is primary
+    async_session = AsyncSession(sync_session_class=RoutingSession, replica=replicas[0])
+    read_primary(async_session)
+    assert async_session.sync_session.on_primary
+
+
+def test_round_robin():
+    replica_set = ReplicaSet(replicas)
+    assert [replica_set.choose() for _ in range(4)] == replicas * 2
+
+
+def test_least_connections():
+    replica_set = ReplicaSet(replicas, "least_connections")
+    connection = replicas[0].connect()
+    try:
+        assert replica_set.choose() is replicas[1]
+    finally:
+        connection.close()
@@ -0,0 +1,59 @@
+import datetime
+from types import SimpleNamespace
+
+from sqlmodel import Session, create_engine
+
+from app.api.services import SettingsResolver, Timeline
+from app.core.database.models import Settings, SettingsDict
+
+D = datetime.date
+
+
+def version(id, value, active_from, active_to=None):
+    return SimpleNamespace(
+        id=id, value=value, active_from=active_from, active_to=active_to
+    )
+
+
+def test_latest_version_wins_while_it_lasts():
+    timeline = Timeline(
+        [
+            version(1, "100", D(2024, 1, 1)),
+            version(2, "500", D(2024, 3, 1), D(2024, 3, 31)),
+        ]
+    )
+    assert timeline.at(D(2023, 12, 31)) is None
+    assert timeline.at(D(2024, 2, 1)) == "100"
+    assert timeline.at(D(2024, 3, 31)) == "500"
+    assert timeline.at(D(2024, 4, 1)) == "100"
+    assert timeline.next_change(D(2024, 2, 1)) == D(2024, 3, 1)
+    assert timeline.next_change(D(2024, 4, 1)) is None
+
+
+def test_gap_after_last_version_ends():
+    timeline = Timeline([version(1, "5", D(2023, 11, 1), D(2024, 12, 31))])
+    assert timeline.at(D(2024, 12, 31)) == "5"
+    assert timeline.at(D(2025, 1, 1)) is None
+    assert timeline.next_change(D(2024, 6, 1)) == D(2025, 1, 1)
+
+
+def test_stale_values_are_reloaded_on_read():
+    engine = create_engine("sqlite://")
+    SettingsDict.__table__.create(engine)
+    Settings.__table__.create(engine)
+    with Session(engine) as session:
+        session.add(SettingsDict(id=1, code="api_rate_limit", name="Rate"))
+        session.add(
+            Settings(id=1, setting_code_id=1, value="100", active_from=D(2024, 1, 1))
+        )
+        session.commit()
+    resolver = SettingsResolver(ttl=300)
+    assert resolver.value("api_rate_limit") is None
+    resolver.bind(engine)
+    assert resolver.value("api_rate_limit") == "100"
+    with Session(engine) as session:
+        session.get(Settings, 1).value = "500"
+        session.commit()
+    assert resolver.value("api_rate_limit") == "100"
+    resolver.invalidate()
+    assert resolver.value("api_rate_limit") == "500"
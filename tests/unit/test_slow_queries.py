@@ -0,0 +1,27 @@
+import datetime
+
+from app.core.database.slow_queries import normalize, parameters_shape
+
+
+def test_normalize_collapses_literals_and_in_lists():
+    statement = """
+        SELECT users.id FROM users
+        WHERE users.company_id IN (%(company_id_1_1)s, %(company_id_1_2)s)
+          AND users.name = 'Иван' AND users.id > 10
+    """
+    assert normalize(statement) == (
+        "SELECT users.id FROM users WHERE users.company_id IN (...) "
+        "AND users.name = ? AND users.id > ?"
+    )
+
+
+def test_parameters_shape_keeps_types_only():
+    assert parameters_shape({"id": 1, "day": datetime.date(2024, 1, 1)}) == {
+        "id": "int",
+        "day": "date",
+    }
+    assert parameters_shape([{"id": 1}, {"id": 2}]) == {
+        "rows": 2,
+        "row": {"id": "int"},
+    }
+    assert parameters_shape(None) is None
@@ -0,0 +1,23 @@
+from app.core.timing import RequestTimings, _current, phase
+
+
+def test_phases_add_up_in_server_timing():
+    timings = RequestTimings("req-1")
+    token = _current.set(timings)
+    try:
+        with phase("auth"):
+            pass
+        timings.add("db", 0.002)
+        timings.add("db", 0.0015)
+    finally:
+        _current.reset(token)
+    timings.total = 0.01
+    assert timings.milliseconds()["db"] == 3.5
+    assert timings.server_timing().endswith(
+        "db;dur=3.5, serialize;dur=0.0, total;dur=10.0"
+    )
+
+
+def test_phase_outside_a_request_is_a_no_op():
+    with phase("auth"):
+        pass
@@ -0,0 +1,20 @@
+from app.api.services import CSV, NDJSON, parse_users
+
+HEADER = "company_id,group_id,timezone_id,username,firtsname,lastname,password"
+
+
+def test_csv_rows_keep_their_line_numbers():
+    body = f"{HEADER}\n1,2,3,jdoe,John,Doe,secret\n1,x,3,jroe,Jane,,secret\n"
+    rows, errors = parse_users(body.encode(), CSV, max_rows=10)
+    assert [(line, user.username) for line, user in rows] == [(2, "jdoe")]
+    assert rows[0][1].patronymic is None
+    assert list(errors) == [3]
+    assert [message.split(":")[0] for message in errors[3]] == ["group_id", "lastname"]
+
+
+def test_ndjson_reports_broken_lines():
+    body = b'{"company_id": 1}\n\n{broken\n'
+    rows, errors = parse_users(body, NDJSON, max_rows=10)
+    assert rows == []
+    assert list(errors) == [1, 3]
+    assert errors[3][0].startswith("invalid JSON")